@@ -0,0 +1,155 @@
+import argparse
+import importlib
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# CONSTANTS
+REPO_DIR = Path(__file__).resolve().parent
+DATA_DIR = REPO_DIR / "Data"
+DAY_MODULE_PATTERN = re.compile(r"day(\d+)\.py")
+
+class DayNotRunnableError(Exception):
+    """Raised when a day has no Python solution or its module does not provide the runner interface."""
+
+def discover_days() -> dict[int, str]:
+    """Finds the Python solutions next to this file without importing any of them.
+
+    Returns:
+        dict[int, str]: The module name for each day, sorted by day.
+    """
+    days = {}
+    for path in REPO_DIR.glob("day*.py"):
+        match = DAY_MODULE_PATTERN.fullmatch(path.name)
+        if match:
+            days[int(match.group(1))] = path.stem
+    return dict(sorted(days.items()))
+
+def time_call(function, *args) -> tuple[object, float]:
+    """Calls a function and times it.
+
+    Args:
+        function: The function to call.
+        *args: The arguments to pass to it.
+
+    Returns:
+        tuple[object, float]: What the function returned and the wall time it took in seconds.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return (result, time.perf_counter() - start)
+
+def run_day(day: int, part: int | None = None, inputPath: str | None = None) -> dict:
+    """Imports only the module for the day and runs its solution. Each day module provides read_input(path),
+    part1(data) and part2(data).
+
+    Args:
+        day (int): The day to run.
+        part (int | None, optional): Only run this part. Defaults to None which runs both.
+        inputPath (str | None, optional): The input file. Defaults to None which uses Data/day<day>.txt.
+
+    Returns:
+        dict: The answers along with the import, parse and per part wall times in seconds.
+    """
+    days = discover_days()
+    if day not in days:
+        raise DayNotRunnableError(f"There is no Python solution for day {day}")
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    (module, importTime) = time_call(importlib.import_module, days[day])
+    if not all(hasattr(module, name) for name in ("read_input", "part1", "part2")):
+        raise DayNotRunnableError(f"Day {day} does not provide read_input, part1 and part2")
+    report = {"day": day, "import": importTime}
+    (data, report["parse"]) = time_call(module.read_input, inputPath or str(DATA_DIR / f"day{day}.txt"))
+    for partNum in (1, 2):
+        if part is None or part == partNum:
+            (report[f"part{partNum}Answer"], report[f"part{partNum}"]) = time_call(getattr(module, f"part{partNum}"), data)
+    return report
+
+def print_day_report(report: dict):
+    """Prints the answers and timings of a single day.
+
+    Args:
+        report (dict): The report from run_day.
+    """
+    print(f"Day {report['day']}")
+    print(f"  import  {report['import'] * 1000:10.2f} ms")
+    print(f"  parse   {report['parse'] * 1000:10.2f} ms")
+    for partNum in (1, 2):
+        if f"part{partNum}" in report:
+            print(f"  part {partNum}  {report[f'part{partNum}'] * 1000:10.2f} ms  {report[f'part{partNum}Answer']}")
+
+def run_all_days(part: int | None = None) -> list[dict]:
+    """Runs every day in its own interpreter so each day's startup time, including the imports it needs,
+    is measured from a cold start.
+
+    Args:
+        part (int | None, optional): Only run this part of each day. Defaults to None which runs both.
+
+    Returns:
+        list[dict]: The report of each day as given by run_day, plus the total wall time of its process.
+    """
+    reports = []
+    for day in discover_days():
+        command = [sys.executable, str(Path(__file__).resolve()), "run", str(day), "--json"]
+        if part is not None:
+            command += ["--part", str(part)]
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=REPO_DIR)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            reports.append({"day": day, "error": completed.stderr.strip().splitlines()[-1:], "process": elapsed})
+            continue
+        report = json.loads(completed.stdout)
+        report["process"] = elapsed
+        reports.append(report)
+    return reports
+
+def print_startup_report(reports: list[dict]):
+    """Prints the combined timings of every day as a table with totals.
+
+    Args:
+        reports (list[dict]): The reports from run_all_days.
+    """
+    columns = ("process", "import", "parse", "part1", "part2")
+    print(f"{'day':>4}" + "".join(f"{column:>12}" for column in columns) + "  (ms)")
+    totals = dict.fromkeys(columns, 0.0)
+    for report in reports:
+        if "error" in report:
+            print(f"{report['day']:>4}  failed: {' '.join(report['error'])}")
+            continue
+        cells = []
+        for column in columns:
+            totals[column] += report.get(column, 0.0)
+            cells.append(f"{report[column] * 1000:12.2f}" if column in report else f"{'-':>12}")
+        print(f"{report['day']:>4}" + "".join(cells))
+    print(f"{'all':>4}" + "".join(f"{totals[column] * 1000:12.2f}" for column in columns))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m aoc", description="Runs the Python Advent of Code 2024 solutions.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    runParser = subparsers.add_parser("run", help="Run one day or all of them.")
+    runParser.add_argument("day", help="The day to run, or all.")
+    runParser.add_argument("--part", type=int, choices=(1, 2), help="Only run this part.")
+    runParser.add_argument("--input", help="The input file. Defaults to Data/day<day>.txt.")
+    runParser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    if args.day != "all" and not args.day.isdigit():
+        parser.error(f"Day must be a number or all, not {args.day}")
+    if args.day == "all":
+        if args.input:
+            parser.error("--input can only be used with a single day")
+        print_startup_report(run_all_days(args.part))
+    else:
+        try:
+            report = run_day(int(args.day), args.part, args.input)
+        except DayNotRunnableError as error:
+            parser.error(str(error))
+        if args.json:
+            print(json.dumps(report, default=int))
+        else:
+            print_day_report(report)
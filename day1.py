@@ -1,3 +1,170 @@
+import heapq
+import os
+import tempfile
+from array import array
+from typing import Iterator
+
+import numpy as np
+
+# CONSTANTS
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024 # Bytes allowed in memory for the external sort
+ESTIMATED_BYTES_PER_ROW = 128 # Two Python ints plus their list slots, with some headroom
+STREAMING_THRESHOLD_BYTES = 1024 * 1024 * 1024 # Inputs larger than this use the external sort
+
+def load_columns(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Parses the location ID file straight into two int64 columns.
+
+    Args:
+        path (str): The path to the whitespace separated two column input file.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The left and right columns as int64 arrays.
+    """
+    data = np.fromfile(path, dtype=np.int64, sep=" ").reshape(-1, 2) # Any whitespace counts as a separator
+    return (data[:, 0], data[:, 1])
+
+def determine_distance_columnar(leftColumn: np.ndarray, rightColumn: np.ndarray) -> int:
+    """Calculates the total distance between the two columns by sorting each one and summing
+    the absolute differences in a single vectorized pass.
+
+    Args:
+        leftColumn (np.ndarray): The left location IDs. Does not need to be sorted.
+        rightColumn (np.ndarray): The right location IDs. Does not need to be sorted.
+
+    Returns:
+        int: The sum of the distances between the paired up location IDs.
+    """
+    return int(np.abs(np.sort(leftColumn) - np.sort(rightColumn)).sum())
+
+def calculate_similarity_columnar(leftColumn: np.ndarray, rightColumn: np.ndarray) -> int:
+    """Calculates the similarity score by building a histogram of the right column once and
+    joining the left column against it with a binary search instead of counting per item.
+
+    Args:
+        leftColumn (np.ndarray): The left location IDs.
+        rightColumn (np.ndarray): The right location IDs.
+
+    Returns:
+        int: The cumulative similarity score.
+    """
+    values, counts = np.unique(rightColumn, return_counts=True)
+    if len(values) == 0:
+        return 0
+    positions = np.searchsorted(values, leftColumn)
+    positions[positions == len(values)] = 0 # Clamp so the lookup below stays in bounds
+    occurences = np.where(values[positions] == leftColumn, counts[positions], 0)
+    return int((leftColumn * occurences).sum())
+
+def write_sorted_runs(path: str, runDirectory: str, memoryBudget: int) -> list[tuple[str, str]]:
+    """Reads the location ID file in bounded chunks, sorts each column of the chunk and writes
+    the two sorted runs out as binary int64 files.
+
+    Args:
+        path (str): The path to the two column input file.
+        runDirectory (str): The directory to write the sorted runs to.
+        memoryBudget (int): The rough number of bytes allowed for a chunk held in memory.
+
+    Returns:
+        list[tuple[str, str]]: The paths of the left and right run files for each chunk.
+    """
+    rowsPerRun = max(1, memoryBudget // ESTIMATED_BYTES_PER_ROW)
+    runs = []
+    def flush_run(leftChunk: list[int], rightChunk: list[int]):
+        """Sorts the current chunk and writes both of its columns to disk.
+
+        Args:
+            leftChunk (list[int]): The left location IDs in the chunk.
+            rightChunk (list[int]): The right location IDs in the chunk.
+        """
+        runPaths = []
+        for side, chunk in (("left", leftChunk), ("right", rightChunk)):
+            chunk.sort()
+            runPath = os.path.join(runDirectory, f"{side}{len(runs)}.bin")
+            with open(runPath, "wb") as runFile:
+                array("q", chunk).tofile(runFile)
+            runPaths.append(runPath)
+        runs.append(tuple(runPaths))
+    leftChunk = []
+    rightChunk = []
+    with open(path, "r") as file:
+        for line in file:
+            if line.isspace():
+                continue
+            [left, right] = line.split()
+            leftChunk.append(int(left))
+            rightChunk.append(int(right))
+            if len(leftChunk) == rowsPerRun:
+                flush_run(leftChunk, rightChunk)
+                leftChunk = []
+                rightChunk = []
+    if leftChunk:
+        flush_run(leftChunk, rightChunk)
+    return runs
+
+def read_run(runPath: str, side: int, blockSize: int) -> Iterator[tuple[int, int]]:
+    """Streams a sorted run back from disk a block at a time, tagging each value with its column.
+
+    Args:
+        runPath (str): The path of the binary run file.
+        side (int): The column the run belongs to. 0 for the left and 1 for the right.
+        blockSize (int): The number of values to read from disk at once.
+
+    Yields:
+        Iterator[tuple[int, int]]: Each value in the run paired with its column.
+    """
+    with open(runPath, "rb") as runFile:
+        while True:
+            block = array("q")
+            try:
+                block.fromfile(runFile, blockSize)
+            except EOFError: # Raised on the final short block but the values read are still kept
+                pass
+            if not block:
+                return
+            for value in block:
+                yield (value, side)
+
+def distance_and_similarity_external(path: str, memoryBudget: int = DEFAULT_MEMORY_BUDGET) -> tuple[int, int]:
+    """Calculates both the total distance and the similarity score for inputs larger than memory.
+    The file is split into sorted runs on disk which are then k-way merged into one stream ordered
+    by value. Walking that stream once gives the similarity from the counts of each value in both
+    columns. The distance between the sorted columns is the area between their cumulative counts,
+    so it is the gap between distinct values times how far apart the counts are at that point.
+
+    Args:
+        path (str): The path to the two column input file.
+        memoryBudget (int, optional): The rough number of bytes to hold in memory. Defaults to DEFAULT_MEMORY_BUDGET.
+
+    Returns:
+        tuple[int, int]: The total distance and the cumulative similarity score.
+    """
+    with tempfile.TemporaryDirectory() as runDirectory:
+        runs = write_sorted_runs(path, runDirectory, memoryBudget)
+        blockSize = max(1, memoryBudget // (2 * max(1, len(runs)) * array("q").itemsize))
+        streams = []
+        for (leftRun, rightRun) in runs:
+            streams.append(read_run(leftRun, 0, blockSize))
+            streams.append(read_run(rightRun, 1, blockSize))
+
+        sumDistances = 0
+        cumulativeSimilarity = 0
+        seen = [0, 0] # How many values from each column have been passed so far
+        prevValue = None
+        runCounts = [0, 0] # How many times the current value appears in each column
+        for (value, side) in heapq.merge(*streams):
+            if value != prevValue:
+                if prevValue is not None:
+                    cumulativeSimilarity += prevValue * runCounts[0] * runCounts[1]
+                    seen[0] += runCounts[0]
+                    seen[1] += runCounts[1]
+                    sumDistances += abs(seen[0] - seen[1]) * (value - prevValue)
+                prevValue = value
+                runCounts = [0, 0]
+            runCounts[side] += 1
+        if prevValue is not None:
+            cumulativeSimilarity += prevValue * runCounts[0] * runCounts[1]
+    return (sumDistances, cumulativeSimilarity)
+
 def determine_distance(leftList: list[str], rightList: list[str]):
     # Go through each corresponding element least to greatest of each list and compare the distance
     sumDistances = 0
@@ -13,23 +180,51 @@ def calculate_similarity(leftList: list[str], rightList: list[str]):
         cumulativeSimilarity += int(item) * occurences
     return cumulativeSimilarity
 
-if __name__ == "__main__":
-    # Compile lists into left and right lists
-    leftList = []
-    rightList = []
-    with open("./Data/day1.txt", "r") as file:
-        for line in file:
-            [left, right] = line.strip().split("   ") # Stripping of white space and separating on the space
-            leftList.append(left)
-            rightList.append(right)
+def read_input(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Reads the input for the aoc runner.
+
+    Args:
+        path (str): The path to the input file.
 
-    # Sort the lists
-    leftList.sort()
-    rightList.sort()
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The left and right columns as int64 arrays.
+    """
+    return load_columns(path)
+
+def part1(columns: tuple[np.ndarray, np.ndarray]) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        columns (tuple[np.ndarray, np.ndarray]): The columns from read_input.
+
+    Returns:
+        int: The total distance.
+    """
+    return determine_distance_columnar(*columns)
+
+def part2(columns: tuple[np.ndarray, np.ndarray]) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        columns (tuple[np.ndarray, np.ndarray]): The columns from read_input.
+
+    Returns:
+        int: The total similarity score.
+    """
+    return calculate_similarity_columnar(*columns)
+
+if __name__ == "__main__":
+    path = "./Data/day1.txt"
+    if os.path.getsize(path) > STREAMING_THRESHOLD_BYTES:
+        # Too big to hold in memory so sort and merge through temporary files
+        (sumDistances, cumulativeSimilarity) = distance_and_similarity_external(path)
+    else:
+        # Load both columns as int64 arrays
+        (leftColumn, rightColumn) = load_columns(path)
 
-    # Run the calculations to determine the answers
-    sumDistances = determine_distance(leftList, rightList)
-    cumulativeSimilarity = calculate_similarity(leftList, rightList)
+        # Run the calculations to determine the answers
+        sumDistances = determine_distance_columnar(leftColumn, rightColumn)
+        cumulativeSimilarity = calculate_similarity_columnar(leftColumn, rightColumn)
 
     # Outputting the answer for part 1
     print(f"(Part 1) Total Distance: {sumDistances}")
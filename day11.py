@@ -1,9 +1,49 @@
 
-from concurrent.futures import ThreadPoolExecutor
-import threading
+from __future__ import annotations
 
 from collections import defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING: # NumPy is only imported when the transition matrix is actually used
+    import numpy as np
+
+# CONSTANTS
+NUM_WORKERS = 4 # Worker processes for the sharded blink, threads do not help because of the GIL
+BLINKS_PER_ROUND = 5 # Blinks each shard does before the shards are merged and re-partitioned
+PARALLEL_MIN_STONES = 20000 # Fewer distinct stones than this are blinked serially
+TRANSITION_CACHE_SIZE = 1 << 16 # Most recently used stone transitions to keep
+P1_NUM_BLINKS = 25
+P2_NUM_BLINKS = 75
+CLOSED_SET_LIMIT = 5000 # Most distinct stone values the transition matrix is built for
+FLOAT_MANTISSA_BITS = 53 # Integers below 2**53 are exact in float64
+MODULAR_MULTIPLY_ADDS_PER_STEP = 5000 # Modular matrix multiply-adds that cost about as much as blinking one value once
+EXACT_MULTIPLY_ADDS_PER_STEP = 5 # Exact object matrix multiply-adds that cost about as much as blinking one value once
     
+@lru_cache(maxsize=TRANSITION_CACHE_SIZE)
+def stone_transition(number: int) -> tuple[int, ...]:
+    """Gets the stones a single stone turns into after one blink. The digits are counted by comparing
+    against powers of ten instead of converting to a string, and the results are memoized since the same
+    values come up blink after blink. The memo is bounded by TRANSITION_CACHE_SIZE.
+
+    Args:
+        number (int): The value of the stone.
+
+    Returns:
+        tuple[int, ...]: The values of the stones it turns into.
+    """
+    if number == 0:
+        return (1,)
+    numDigits = 1
+    power = 10
+    while power <= number:
+        numDigits += 1
+        power *= 10
+    if numDigits % 2 == 0:
+        half = 10 ** (numDigits // 2)
+        return (number // half, number % half)
+    return (number * 2024,)
+
 def blink(numbers: defaultdict[int]) -> defaultdict[int]:
     """Calculates the new format of the stones after blinking according to the rules specified in AoC.
     For this a defaultdict is being used where the key keeps track of the number and this causes it to
@@ -19,54 +59,289 @@ def blink(numbers: defaultdict[int]) -> defaultdict[int]:
         defaultdict[int]: The state of the stones after the blink
     """
     newDict = defaultdict(int)
-    for number in numbers:
-        if number == 0:
-            newDict[1] += numbers[0]
-        elif len(str(number)) % 2 == 0:
-            # Instead of converting back and forth, do the logic directly
-            midIndex = len(str(number)) // 2
-            left = number // (10 ** midIndex)
-            right = number % (10 ** midIndex)
-            newDict[left] += numbers[number]
-            newDict[right] += numbers[number]
-            #i += 1  # Skip the next element, as it's been inserted already
-        else:
-            newDict[number * 2024] += numbers[number]
+    for number, count in numbers.items():
+        for newNumber in stone_transition(number):
+            newDict[newNumber] += count
     return newDict
     
-def blink_num(numbers: defaultdict[int], numBlinks: int) -> int:
-    """Blinks a given number of times.
+def blink_num(numbers: defaultdict[int], numBlinks: int, modulus: int | None = None) -> int:
+    """Blinks a given number of times. With a modulus the counts are reduced after every blink so they
+    stay small instead of growing exponentially.
 
     Args:
         numbers (defaultdict[int]): The defaultdict which represents the starting state of the stones.
         numBlinks (int): The number of times to blink.
+        modulus (int | None, optional): Count modulo this number. Defaults to None for the exact count.
 
     Returns:
-        int: The number of stones in the final state of the stones.
+        int: The number of stones in the final state of the stones, reduced by the modulus if one is given.
     """
     for i in range(numBlinks):
         numbers = blink(numbers)
+        if modulus is not None:
+            for number in numbers:
+                numbers[number] %= modulus
+    if modulus is not None:
+        return sum(numbers.values()) % modulus
     return sum(numbers.values())
 
-# CONSTANTS
-NUM_THREADS = 4
-P1_NUM_BLINKS = 25
-P2_NUM_BLINKS = 75
+def blink_shard(shard: dict[int, int], numBlinks: int) -> dict[int, int]:
+    """Blinks one shard of the stones a number of times. Stones never affect each other so a shard can be
+    blinked on its own.
 
+    Args:
+        shard (dict[int, int]): The stone values in the shard mapped to how many of each there are.
+        numBlinks (int): The number of times to blink.
 
-if __name__ == "__main__":
+    Returns:
+        dict[int, int]: The state of the shard after blinking.
+    """
+    numbers = defaultdict(int, shard)
+    for _ in range(numBlinks):
+        numbers = blink(numbers)
+    return dict(numbers)
+
+def partition_stones(numbers: defaultdict[int], numShards: int) -> list[dict[int, int]]:
+    """Splits the stones into shards by the hash of their value so every copy of a value lands in the same shard.
+
+    Args:
+        numbers (defaultdict[int]): The state of the stones.
+        numShards (int): The number of shards to split into.
+
+    Returns:
+        list[dict[int, int]]: The shards.
+    """
+    shards = [{} for _ in range(numShards)]
+    for number, count in numbers.items():
+        shards[hash(number) % numShards][number] = count
+    return shards
+
+def blink_num_parallel(numbers: defaultdict[int], numBlinks: int, numWorkers: int = NUM_WORKERS, blinksPerRound: int = BLINKS_PER_ROUND, minDistinctStones: int = PARALLEL_MIN_STONES) -> int:
+    """Blinks a given number of times with the stones sharded across worker processes. Each round the shards
+    are blinked separately and then merged and re-partitioned, since the same value can show up in several
+    shards and merging them keeps the number of distinct stones down. Rounds with fewer than minDistinctStones
+    distinct stones are done serially because sending the shards to the workers would cost more than blinking them.
+
+    Args:
+        numbers (defaultdict[int]): The defaultdict which represents the starting state of the stones.
+        numBlinks (int): The number of times to blink.
+        numWorkers (int, optional): The number of worker processes. Defaults to NUM_WORKERS.
+        blinksPerRound (int, optional): The number of blinks between merges. Defaults to BLINKS_PER_ROUND.
+        minDistinctStones (int, optional): The fewest distinct stones worth blinking in parallel. Defaults to PARALLEL_MIN_STONES.
+
+    Returns:
+        int: The number of stones in the final state of the stones.
+    """
+    executor = None
+    try:
+        remaining = numBlinks
+        while remaining > 0:
+            roundBlinks = min(blinksPerRound, remaining)
+            if numWorkers <= 1 or len(numbers) < minDistinctStones:
+                for _ in range(roundBlinks):
+                    numbers = blink(numbers)
+            else:
+                if executor is None: # Started by the first round with enough stones to be worth sharding
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=numWorkers)
+                shards = partition_stones(numbers, numWorkers)
+                numbers = defaultdict(int)
+                for shard in executor.map(blink_shard, shards, [roundBlinks] * len(shards)):
+                    for number, count in shard.items():
+                        numbers[number] += count
+            remaining -= roundBlinks
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return sum(numbers.values())
+
+def blink_checkpoints(numbers: defaultdict[int], checkpoints: list[int]) -> dict[int, int]:
+    """Blinks up to the largest checkpoint in one forward pass, recording the number of stones at each
+    checkpoint along the way instead of starting over for each one.
+
+    Args:
+        numbers (defaultdict[int]): The defaultdict which represents the starting state of the stones.
+        checkpoints (list[int]): The numbers of blinks to record the number of stones at.
+
+    Returns:
+        dict[int, int]: The number of stones after each checkpoint's number of blinks.
+    """
+    wanted = set(checkpoints)
+    counts = {}
+    if 0 in wanted:
+        counts[0] = sum(numbers.values())
+    for i in range(1, max(wanted, default=0) + 1):
+        numbers = blink(numbers)
+        if i in wanted:
+            counts[i] = sum(numbers.values())
+    return counts
+
+def find_closed_values(numbers: defaultdict[int], valueLimit: int = CLOSED_SET_LIMIT) -> list[int] | None:
+    """Finds every stone value that can ever be reached from the starting stones.
+
+    Args:
+        numbers (defaultdict[int]): The starting state of the stones.
+        valueLimit (int, optional): The most values to look for before giving up. Defaults to CLOSED_SET_LIMIT.
+
+    Returns:
+        list[int] | None: The reachable values or None if there are more than valueLimit of them.
+    """
+    seen = set(numbers)
+    toVisit = list(seen)
+    while toVisit:
+        for newNumber in stone_transition(toVisit.pop()):
+            if newNumber not in seen:
+                if len(seen) == valueLimit:
+                    return None
+                seen.add(newNumber)
+                toVisit.append(newNumber)
+    return sorted(seen)
+
+def modular_matmul(left: np.ndarray, right: np.ndarray, modulus: int) -> np.ndarray:
+    """Multiplies two int64 matrices (or vectors) with entries below the modulus and reduces the result by
+    the modulus. To use the fast floating point routines while staying exact, the left side is split into
+    limbs small enough that every sum of products fits in the float64 mantissa.
+
+    Args:
+        left (np.ndarray): The left operand with entries in [0, modulus).
+        right (np.ndarray): The right operand with entries in [0, modulus).
+        modulus (int): The modulus, which must fit in 31 bits.
+
+    Returns:
+        np.ndarray: The product reduced by the modulus.
+    """
+    import numpy as np
+    limbBits = FLOAT_MANTISSA_BITS - modulus.bit_length() - left.shape[-1].bit_length()
+    if limbBits < 1 or modulus.bit_length() > 31:
+        raise ValueError(f"Modulus {modulus} is too large for exact products of size {left.shape[-1]}")
+    rightFloat = right.astype(np.float64)
+    result = np.zeros(np.broadcast_shapes(left.shape[:-1] + right.shape[1:]), dtype=np.int64)
+    for shift in range(0, modulus.bit_length(), limbBits):
+        limb = ((left >> shift) & ((1 << limbBits) - 1)).astype(np.float64)
+        partial = np.asarray(limb @ rightFloat).astype(np.int64) % modulus
+        result = (result + partial * pow(2, shift, modulus)) % modulus
+    return result
+
+def matrix_pays_off(numValues: int, numBlinks: int, modular: bool) -> bool:
+    """Estimates whether raising the transition matrix to the number of blinks is cheaper than blinking step
+    by step. Blinking costs about one pass over the values per blink while exponentiation by squaring costs
+    about one dense product, numValues**3 multiply-adds, per bit of the number of blinks. The multiply-adds
+    are far cheaper than blinking a value when done modulo a number with floats, but exact object products
+    are hardly cheaper at all, so exact mode only wins for tiny sets of values.
+
+    Args:
+        numValues (int): The number of distinct values in the closed set.
+        numBlinks (int): The number of times to blink.
+        modular (bool): Whether the products are done modulo a number instead of exactly.
+
+    Returns:
+        bool: Whether the matrix is expected to be faster.
+    """
+    multiplyAddsPerStep = MODULAR_MULTIPLY_ADDS_PER_STEP if modular else EXACT_MULTIPLY_ADDS_PER_STEP
+    matrixCost = numValues ** 3 * numBlinks.bit_length() / multiplyAddsPerStep
+    return matrixCost < numValues * numBlinks
+
+def count_stones_matrix(numbers: defaultdict[int], numBlinks: int, modulus: int | None = None, valueLimit: int = CLOSED_SET_LIMIT) -> int:
+    """Counts the stones after any number of blinks by raising the transition matrix between the reachable
+    stone values to the number of blinks with exponentiation by squaring. Entry (i, j) of the matrix is how
+    many stones of value j one stone of value i turns into, so the total is the starting counts times the
+    matrix power times a vector of ones. Without a modulus the counts are exact Python integers, which is
+    only practical for small sets of values. If the values are not closed within valueLimit, or there are
+    the matrix does not pay off as judged by matrix_pays_off, this falls back to blinking step by step.
+
+    Args:
+        numbers (defaultdict[int]): The starting state of the stones.
+        numBlinks (int): The number of times to blink.
+        modulus (int | None, optional): Count modulo this number. Defaults to None for the exact count.
+        valueLimit (int, optional): The most distinct values to build the matrix for. Defaults to CLOSED_SET_LIMIT.
+
+    Returns:
+        int: The number of stones after blinking, reduced by the modulus if one is given.
+    """
+    import numpy as np
+    values = find_closed_values(numbers, valueLimit)
+    if values is None or not matrix_pays_off(len(values), numBlinks, modulus is not None):
+        return blink_num(numbers, numBlinks, modulus)
+    index = {value: i for i, value in enumerate(values)}
+    dtype = object if modulus is None else np.int64
+    matrix = np.zeros((len(values), len(values)), dtype=dtype)
+    for value in values:
+        for newNumber in stone_transition(value):
+            matrix[index[value], index[newNumber]] += 1
+    counts = np.zeros(len(values), dtype=dtype)
+    for number, count in numbers.items():
+        counts[index[number]] += count if modulus is None else count % modulus
+    def multiply(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Multiplies using exact integers or modular arithmetic depending on the modulus.
+
+        Args:
+            left (np.ndarray): The left operand.
+            right (np.ndarray): The right operand.
+
+        Returns:
+            np.ndarray: The product.
+        """
+        if modulus is None:
+            return left.dot(right)
+        return modular_matmul(left, right, modulus)
+    stonesFrom = np.ones(len(values), dtype=dtype) # Number of stones each value becomes after the blinks so far
+    power = matrix
+    while numBlinks > 0:
+        if numBlinks & 1:
+            stonesFrom = multiply(power, stonesFrom)
+        numBlinks >>= 1
+        if numBlinks > 0:
+            power = multiply(power, power)
+    return int(multiply(counts, stonesFrom))
+
+def read_input(path: str) -> defaultdict[int]:
+    """Reads the starting stones from the input file.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        defaultdict[int]: The starting state of the stones.
+    """
     initial = ""
     numbers = defaultdict(int)
-    # Opening the text file and formatting the data
-    with open("./Data/day11.txt", "r") as file:
+    with open(path, "r") as file:
         for line in file:
             initial += line.strip()
     ogList = initial.split(" ")
     for i in ogList:
         numbers[int(i)] += 1
+    return numbers
+
+def part1(numbers: defaultdict[int]) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        numbers (defaultdict[int]): The starting stones from read_input.
+
+    Returns:
+        int: The number of stones after P1_NUM_BLINKS blinks.
+    """
+    return blink_num(numbers, P1_NUM_BLINKS)
+
+def part2(numbers: defaultdict[int]) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        numbers (defaultdict[int]): The starting stones from read_input.
+
+    Returns:
+        int: The number of stones after P2_NUM_BLINKS blinks.
+    """
+    return blink_num(numbers, P2_NUM_BLINKS)
+
+if __name__ == "__main__":
+    # Opening the text file and formatting the data
+    numbers = read_input("./Data/day11.txt")
     print(numbers)
-    numStonesP1 = blink_num(numbers, P1_NUM_BLINKS)
-    numStonesP2 = blink_num(numbers, P2_NUM_BLINKS)
+    stoneCounts = blink_checkpoints(numbers, [P1_NUM_BLINKS, P2_NUM_BLINKS])
+    numStonesP1 = stoneCounts[P1_NUM_BLINKS]
+    numStonesP2 = stoneCounts[P2_NUM_BLINKS]
     print(f"(Part 1) The number of stones after {P1_NUM_BLINKS} blinks is: {numStonesP1}")
     print(f"(Part 2) The number of stones after {P2_NUM_BLINKS} blinks is: {numStonesP2}")
     
\ No newline at end of file
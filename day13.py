@@ -1,4 +1,13 @@
 import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+
+# CONSTANTS
+A_PRESS_COST = 3
+B_PRESS_COST = 1
+MACHINE_DTYPE = np.dtype([("ax", np.int64), ("ay", np.int64), ("bx", np.int64), ("by", np.int64), ("px", np.int64), ("py", np.int64)])
+MACHINE_PATTERN = r"Button A: X([+-]?\d+), Y([+-]?\d+)\s+Button B: X([+-]?\d+), Y([+-]?\d+)\s+Prize: X=([+-]?\d+), Y=([+-]?\d+)"
+PART2_PRIZE_OFFSET = 10000000000000
+INT64_SAFE_BITS = 63 # Magnitudes smaller than 2**63 fit in int64
 
 def organize_machines(machines: list[str]) -> list[dict]:
     """Parses the input file and stores each machine in a dictionary.
@@ -76,22 +85,237 @@ def all_machines_least_tokens(machines: list[dict]) -> int:
             sum += leastCost
     return sum
 
+def machines_to_array(machines: list[dict]) -> np.ndarray:
+    """Packs the machines into one integer matrix so they can all be solved at once.
+
+    Args:
+        machines (list[dict]): The list of machines as made by organize_machines.
+
+    Returns:
+        np.ndarray: One row per machine holding ax, ay, bx, by, px and py.
+    """
+    rows = [(*machine["A"], *machine["B"], *machine["PRIZE"]) for machine in machines]
+    return np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+def load_machines(path: str) -> np.ndarray:
+    """Parses every machine in the input file with a single regex pass into one compact structured array.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        np.ndarray: A structured array of MACHINE_DTYPE with one record per machine.
+    """
+    return np.fromregex(path, MACHINE_PATTERN, MACHINE_DTYPE)
+
+def as_machine_matrix(machineArray: np.ndarray) -> np.ndarray:
+    """Gets the machines as a plain n x 6 integer matrix whether they are structured records from
+    load_machines or already a matrix from machines_to_array. Structured records are viewed without copying.
+
+    Args:
+        machineArray (np.ndarray): The machines as a structured array or a matrix.
+
+    Returns:
+        np.ndarray: One row per machine holding ax, ay, bx, by, px and py.
+    """
+    if machineArray.dtype.names is not None:
+        return structured_to_unstructured(machineArray, copy=False)
+    return machineArray
+
+def fits_int64(numeratorBits: int, numMachines: int) -> bool:
+    """Checks whether every step of solving the machines stays inside int64. The presses are at most the
+    Cramer's rule numerators, the tokens of a machine weight them by the press costs and the fleet total
+    adds up the tokens of every machine, so each of those adds bits on top of the numerators.
+
+    Args:
+        numeratorBits (int): The most bits any Cramer's rule numerator can have.
+        numMachines (int): The number of machines whose tokens get summed together.
+
+    Returns:
+        bool: Whether the numerators, tokens and totals all fit in int64.
+    """
+    costBits = (A_PRESS_COST + B_PRESS_COST).bit_length()
+    return numeratorBits + costBits + numMachines.bit_length() < INT64_SAFE_BITS
+
+def extended_gcd(a: int, b: int) -> tuple[int, int, int]:
+    """Finds the greatest common divisor of a and b along with x and y where a*x + b*y is that divisor.
+
+    Args:
+        a (int): The first number.
+        b (int): The second number.
+
+    Returns:
+        tuple[int, int, int]: The greatest common divisor, x and y.
+    """
+    (oldR, r) = (a, b)
+    (oldX, x) = (1, 0)
+    (oldY, y) = (0, 1)
+    while r != 0:
+        quotient = oldR // r
+        (oldR, r) = (r, oldR - quotient * r)
+        (oldX, x) = (x, oldX - quotient * x)
+        (oldY, y) = (y, oldY - quotient * y)
+    return (oldR, oldX, oldY)
+
+def cheapest_collinear_split(ax: int, ay: int, bx: int, by: int, px: int, py: int) -> int:
+    """Calculates the least tokens for a machine whose buttons move in the same direction, where Cramer's
+    rule does not work. The prize has to be on that line too, and then it is a single equation
+    aPress * u + bPress * v = w along one axis. Every whole number solution is one solution plus steps
+    along (v/g, -u/g) and the cost changes by the same amount each step, so the cheapest one is at whichever
+    end of the valid range the cost goes down towards. The button moves are expected to be non-negative.
+
+    Args:
+        ax (int): The X movement of button A.
+        ay (int): The Y movement of button A.
+        bx (int): The X movement of button B.
+        by (int): The Y movement of button B.
+        px (int): The X location of the prize.
+        py (int): The Y location of the prize.
+
+    Returns:
+        int: The least amount of tokens to get to the prize, or -1 if it can not be reached.
+    """
+    if ax * py - ay * px != 0 or bx * py - by * px != 0: # Prize is not on the line of the buttons
+        return -1
+    if ax == ay == bx == by == 0: # Neither button moves the claw
+        return 0 if px == py == 0 else -1
+    (u, v, w) = (ax, bx, px) if ax != 0 or bx != 0 else (ay, by, py)
+    (g, x, y) = extended_gcd(u, v)
+    if w % g != 0:
+        return -1
+    if u == 0:
+        return B_PRESS_COST * (w // v) if w >= 0 else -1
+    if v == 0:
+        return A_PRESS_COST * (w // u) if w >= 0 else -1
+    (aPress, bPress) = (x * (w // g), y * (w // g))
+    (aStep, bStep) = (v // g, u // g) # aPress + k * aStep and bPress - k * bStep are also solutions
+    lowest = -(aPress // aStep) # Smallest k keeping aPress >= 0
+    highest = bPress // bStep # Largest k keeping bPress >= 0
+    if lowest > highest:
+        return -1
+    k = lowest if A_PRESS_COST * aStep - B_PRESS_COST * bStep >= 0 else highest
+    return A_PRESS_COST * (aPress + k * aStep) + B_PRESS_COST * (bPress - k * bStep)
+
+def least_tokens_batch(machineArray: np.ndarray) -> np.ndarray:
+    """Calculates the least tokens for every machine at once using Cramer's rule on whole columns with exact
+    integer division checks instead of floating point solving. If the numerators, tokens or their total could
+    overflow int64 the columns are switched to Python integers. Machines with collinear buttons are handled by cheapest_collinear_split.
+
+    Args:
+        machineArray (np.ndarray): The machines as made by load_machines or machines_to_array.
+
+    Returns:
+        np.ndarray: The least amount of tokens for each machine, or -1 where the prize can not be reached.
+    """
+    machineArray = as_machine_matrix(machineArray)
+    largest = int(np.abs(machineArray).max()) if machineArray.size else 0
+    # Each numerator is the difference of two products of the inputs
+    if not fits_int64(2 * largest.bit_length() + 1, len(machineArray)):
+        machineArray = machineArray.astype(object)
+    (ax, ay, bx, by, px, py) = machineArray.T
+    determinant = ax * by - ay * bx
+    aNumerator = px * by - py * bx
+    bNumerator = ax * py - ay * px
+    safeDeterminant = np.where(determinant == 0, 1, determinant)
+    aPress = aNumerator // safeDeterminant
+    bPress = bNumerator // safeDeterminant
+    solvable = (determinant != 0) & (aNumerator % safeDeterminant == 0) & (bNumerator % safeDeterminant == 0) & (aPress >= 0) & (bPress >= 0)
+    tokens = np.where(solvable, A_PRESS_COST * aPress + B_PRESS_COST * bPress, -1)
+    for i in np.flatnonzero(determinant == 0):
+        tokens[i] = cheapest_collinear_split(*(int(value) for value in machineArray[i]))
+    return tokens
+
+def all_machines_least_tokens_batch(machineArray: np.ndarray) -> int:
+    """Gets the total of the least tokens needed for every machine that can be won, solving them all at once.
+
+    Args:
+        machineArray (np.ndarray): The machines as made by load_machines or machines_to_array.
+
+    Returns:
+        int: The least number of tokens for all of the winnable machines summed together.
+    """
+    tokens = least_tokens_batch(machineArray)
+    return int(tokens[tokens != -1].sum())
+
+def total_tokens_sweep(machineArray: np.ndarray, offsets: list[int] | np.ndarray, scales: list[int] | np.ndarray | None = None) -> np.ndarray:
+    """Gets the total least tokens for the whole fleet of machines under many prize scenarios at once. In
+    scenario j every prize becomes prize * scales[j] + offsets[j] on both axes. Since Cramer's rule is linear
+    in the prize, the determinant and the adjugate products of each machine are worked out once and every
+    scenario is a broadcast over machines x scenarios, so the machines are never copied.
+
+    Args:
+        machineArray (np.ndarray): The machines as made by load_machines or machines_to_array.
+        offsets (list[int] | np.ndarray): The amount added to both prize coordinates in each scenario.
+        scales (list[int] | np.ndarray | None, optional): What the prize coordinates are multiplied by in each scenario. Defaults to None which is 1 for every scenario.
+
+    Returns:
+        np.ndarray: The least number of tokens for all of the winnable machines summed together for each scenario.
+    """
+    machineArray = as_machine_matrix(machineArray)
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1)
+    scales = np.ones_like(offsets) if scales is None else np.asarray(scales, dtype=np.int64).reshape(-1)
+    largestMachine = int(np.abs(machineArray).max()) if machineArray.size else 0
+    largestScenario = max(int(np.abs(offsets).max(initial=0)), int(np.abs(scales).max(initial=0)))
+    # Each numerator is a scaled difference of two products plus an offset times a difference of buttons
+    numeratorBits = 2 * largestMachine.bit_length() + largestScenario.bit_length() + 2
+    if not fits_int64(numeratorBits, len(machineArray)):
+        (machineArray, offsets, scales) = (machineArray.astype(object), offsets.astype(object), scales.astype(object))
+    (ax, ay, bx, by, px, py) = (column[:, None] for column in machineArray.T)
+    determinant = ax * by - ay * bx
+    # Numerators from Cramer's rule split into the part from the prize and the part from the offset
+    aNumerator = scales * (px * by - py * bx) + offsets * (by - bx)
+    bNumerator = scales * (ax * py - ay * px) + offsets * (ax - ay)
+    safeDeterminant = np.where(determinant == 0, 1, determinant)
+    aPress = aNumerator // safeDeterminant
+    bPress = bNumerator // safeDeterminant
+    solvable = (determinant != 0) & (aNumerator % safeDeterminant == 0) & (bNumerator % safeDeterminant == 0) & (aPress >= 0) & (bPress >= 0)
+    totals = np.where(solvable, A_PRESS_COST * aPress + B_PRESS_COST * bPress, 0).sum(axis=0)
+    for i in np.flatnonzero(determinant[:, 0] == 0):
+        (ax, ay, bx, by, px, py) = (int(value) for value in machineArray[i])
+        for j in range(len(offsets)):
+            (prizeX, prizeY) = (px * int(scales[j]) + int(offsets[j]), py * int(scales[j]) + int(offsets[j]))
+            tokens = cheapest_collinear_split(ax, ay, bx, by, prizeX, prizeY)
+            if tokens != -1:
+                totals[j] += tokens
+    return totals
+
+def read_input(path: str) -> np.ndarray:
+    """Reads the input for the aoc runner.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        np.ndarray: The machines as a structured array.
+    """
+    return load_machines(path)
+
+def part1(machines: np.ndarray) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        machines (np.ndarray): The machines from read_input.
+
+    Returns:
+        int: The fewest tokens to win all possible prizes.
+    """
+    return int(total_tokens_sweep(machines, [0])[0])
+
+def part2(machines: np.ndarray) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        machines (np.ndarray): The machines from read_input.
+
+    Returns:
+        int: The fewest tokens to win all possible prizes with the converted prize locations.
+    """
+    return int(total_tokens_sweep(machines, [PART2_PRIZE_OFFSET])[0])
+
 if __name__ == "__main__":
-    machines = []
-    machineData = ""
     # Opening the text file and formatting the data
-    with open("./Data/day13.txt", "r") as file:
-        for line in file:
-            if line == '\n':
-                machines.append(machineData)
-                machineData = ""
-            else:
-                machineData += line
-        machines.append(machineData)
-    machines = organize_machines(machines)
-    machinesConverted = unit_converstion_correction(machines)
-    machinesLeastTokens = all_machines_least_tokens(machines)
-    machinesConvertedLeastTokens = all_machines_least_tokens(machinesConverted)
+    machines = load_machines("./Data/day13.txt")
+    (machinesLeastTokens, machinesConvertedLeastTokens) = total_tokens_sweep(machines, [0, PART2_PRIZE_OFFSET])
 
     print(f"(Part 1) Fewest tokens to win all possible prizes: {machinesLeastTokens}")
     print(f"(Part 2) Fewest tokens to win all possible prizes with converted prize: {machinesConvertedLeastTokens}")
@@ -1,6 +1,43 @@
+import struct
+
+# CONSTANTS
+EMPTY = ord(".")
+WALL = ord("#")
+BOX = ord("O")
+ROBOT = ord("@")
+BOX_LEFT = ord("[")
+BOX_RIGHT = ord("]")
+BOX_SYMBOLS = bytes([BOX, BOX_LEFT, BOX_RIGHT])
+WIDE_TILES = str.maketrans({"#": "##", "O": "[]", ".": "..", "@": "@."}) # How each tile is widened
+
+REPLAY_MAGIC = b"AOC15RPL"
+REPLAY_HEADER = struct.Struct("<8sIII") # Magic, width, height and keyframe interval
+KEYFRAME = ord("K")
+DELTA_FRAME = ord("D")
+FRAME_COUNT = struct.Struct("<I") # Number of changed cells in a delta frame
+CHANGED_CELL = struct.Struct("<IB") # Index and new value of a changed cell
+DEFAULT_KEYFRAME_INTERVAL = 1000
+
+baseGrids = None # The starting grids in a simulate_scenarios worker, set by attach_base_grids
+
+def render_grid(grid: bytes | bytearray, width: int) -> str:
+    """Turns a flat grid into the printable map, one line per row.
+
+    Args:
+        grid (bytes | bytearray): The flat grid.
+        width (int): The number of cells in a row.
+
+    Returns:
+        str: The map with a newline after every row.
+    """
+    text = grid.decode("ascii")
+    return "".join(text[start:start+width] + "\n" for start in range(0, len(text), width))
+
 class WarehouseRobotMap():
-    """The object which represents the warehouse robot map.
+    """The object which represents the warehouse robot map. The warehouse is stored as one flat
+    bytearray row after row so a move in any direction is just adding an offset to an index.
     """
+    boxSymbol = BOX # The cell that a box's GPS coordinate is measured from
     def __init__(self, warehouseText: list[str]):
         """The WarehouseRobotMap initializer which takes the input text and turns it
         into the map.
@@ -8,15 +45,96 @@ class WarehouseRobotMap():
         Args:
             warehouseText (list[str]): The input text.
         """
-        self.warehouse = []
-        self.robotPos = ()
-        for i,line in enumerate(warehouseText):
-            row = []
-            for j,char in enumerate(line):
-                row.append(char)
-                if (char == "@"):
-                    self.robotPos = (j, i)
-            self.warehouse.append(row)
+        self.load_grid(warehouseText)
+
+    def load_grid(self, rows: list[str]):
+        """Fills in the flat grid and the direction offsets from the rows of the map, and builds the
+        index of box positions along with their GPS total.
+
+        Args:
+            rows (list[str]): The rows of the map, which all need to be the same width.
+        """
+        self.load_flat_grid(bytearray("".join(rows), "ascii"), len(rows[0]) if rows else 0)
+
+    def load_flat_grid(self, grid: bytearray, width: int):
+        """Takes over an already flat grid, filling in the direction offsets and building the index of box
+        positions along with their GPS total.
+
+        Args:
+            grid (bytearray): The flat grid, which the map will modify in place.
+            width (int): The number of cells in a row.
+        """
+        self.width = width
+        self.height = len(grid) // width if width else 0
+        self.grid = grid
+        self.robotIndex = self.grid.find(ROBOT)
+        self.deltas = {"^": -self.width, ">": 1, "v": self.width, "<": -1}
+        self.boxes = set()
+        self.gpsSum = 0
+        self.changedCells = None # Set to a list to have the indexes of changed cells added to it
+        index = self.grid.find(self.boxSymbol)
+        while index != -1:
+            self.boxes.add(index)
+            self.gpsSum += self.gps_coordinate(index)
+            index = self.grid.find(self.boxSymbol, index + 1)
+
+    @classmethod
+    def from_grid(cls, grid: bytes | bytearray | memoryview, width: int) -> "WarehouseRobotMap":
+        """Makes a map from a copy of a flat grid without parsing any text. This is the cheap way to get
+        many independent maps of the same starting layout.
+
+        Args:
+            grid (bytes | bytearray | memoryview): The flat grid to copy, already widened for the wide map.
+            width (int): The number of cells in a row.
+
+        Returns:
+            WarehouseRobotMap: The new map.
+        """
+        warehouse = cls.__new__(cls)
+        warehouse.load_flat_grid(bytearray(grid), width)
+        return warehouse
+
+    def gps_coordinate(self, index: int) -> int:
+        """Calculates the GPS coordinate of a cell.
+
+        Args:
+            index (int): The index of the cell in the grid.
+
+        Returns:
+            int: 100 times the row plus the column.
+        """
+        return (100 * (index // self.width)) + (index % self.width)
+
+    def move_boxes(self, boxes: list[int], delta: int):
+        """Updates the box index and the GPS total for boxes that have just moved one cell along the offset.
+
+        Args:
+            boxes (list[int]): The indexes the boxes were at before moving.
+            delta (int): The offset they moved by.
+        """
+        for box in boxes:
+            self.boxes.discard(box)
+        for box in boxes:
+            self.boxes.add(box + delta)
+        self.gpsSum += len(boxes) * (100 * (delta // self.width) if abs(delta) == self.width else delta)
+
+    @property
+    def robotPos(self) -> tuple[int, int]:
+        """The (x, y) coordinates of the robot.
+
+        Returns:
+            tuple[int, int]: The coordinates of the robot.
+        """
+        return (self.robotIndex % self.width, self.robotIndex // self.width)
+
+    @robotPos.setter
+    def robotPos(self, coords: tuple[int, int]):
+        """Sets where the robot is from (x, y) coordinates.
+
+        Args:
+            coords (tuple[int, int]): The coordinates of the robot.
+        """
+        self.robotIndex = coords[1] * self.width + coords[0]
 
     def __repr__(self) -> str:
         """Created so the map can be printed.
@@ -24,78 +142,156 @@ class WarehouseRobotMap():
         Returns:
             str: The string to be printed when instance of class is printed.
         """
-        retStr = ""
-        for row in range(len(self.warehouse)):
-            for col in range(len(self.warehouse[row])):
-                retStr += self.warehouse[row][col]
-            retStr += "\n"
-        return retStr
-    
+        return render_grid(self.grid, self.width)
+
+    def push(self, index: int, delta: int) -> bool:
+        """Pushes the object at the index one cell along the offset. It scans ahead over any boxes to the
+        first cell that is not a box, and if that cell is empty the whole chain moves by putting the first
+        box there, so a push costs the length of the chain with no recursion.
+
+        Args:
+            index (int): The index of the object to push.
+            delta (int): The offset of the direction to push in.
+
+        Returns:
+            bool: Whether or not the object moved.
+        """
+        grid = self.grid
+        first = index + delta
+        end = first
+        while 0 <= end < len(grid) and grid[end] == BOX:
+            end += delta
+        if not 0 <= end < len(grid) or grid[end] != EMPTY:
+            return False
+        if grid[index] == BOX or end != first:
+            # Only the box at the back of the chain changes position overall
+            source = index if grid[index] == BOX else first
+            self.boxes.discard(source)
+            self.boxes.add(end)
+            self.gpsSum += self.gps_coordinate(end) - self.gps_coordinate(source)
+        if end != first:
+            grid[end] = BOX
+        grid[first] = grid[index]
+        grid[index] = EMPTY
+        if index == self.robotIndex:
+            self.robotIndex = first
+        if self.changedCells is not None:
+            self.changedCells.extend((index, first, end))
+        return True
+
+    def slide(self, index: int, delta: int, count: int) -> int:
+        """Pushes the object at the index along the offset count times in one go. Scanning ahead, the object
+        moves once for every empty cell it reaches before a wall, so the scan stops at the count'th empty cell.
+        Everything between the object and that cell ends up as the empty cells, then the object, then the boxes
+        it passed packed together in the same order. That whole stretch is written with a single slice assignment.
+
+        Args:
+            index (int): The index of the object to push.
+            delta (int): The offset of the direction to push in.
+            count (int): The number of times to push.
+
+        Returns:
+            int: The number of cells the object actually moved.
+        """
+        grid = self.grid
+        cell = index
+        numEmpty = 0
+        boxCells = bytearray()
+        while numEmpty < count:
+            cell += delta
+            if not 0 <= cell < len(grid):
+                break
+            if grid[cell] == EMPTY:
+                numEmpty += 1
+                lastEmpty = cell
+                movedBoxes = len(boxCells) # Boxes after the last empty cell are stuck against the wall
+            elif grid[cell] in BOX_SYMBOLS:
+                boxCells.append(grid[cell])
+            else:
+                break
+        if numEmpty == 0:
+            return 0
+        stop = lastEmpty + delta
+        stretch = slice(index, stop if stop >= 0 else None, delta)
+        del boxCells[movedBoxes:]
+        oldBoxes = [box for box in range(index, stop, delta) if grid[box] == self.boxSymbol]
+        grid[stretch] = bytes([EMPTY]) * numEmpty + bytes([grid[index]]) + boxCells
+        if self.changedCells is not None:
+            self.changedCells.extend(range(index, stop, delta))
+        newBoxes = [box for box in range(index, stop, delta) if grid[box] == self.boxSymbol]
+        for box in oldBoxes:
+            self.boxes.discard(box)
+        for box in newBoxes:
+            self.boxes.add(box)
+        self.gpsSum += sum(self.gps_coordinate(box) for box in newBoxes) - sum(self.gps_coordinate(box) for box in oldBoxes)
+        if index == self.robotIndex:
+            self.robotIndex = index + numEmpty * delta
+        return numEmpty
+
     def move_object(self, direction: str, coords: tuple[int, int]):
-        """Moves and object on the map. This is meant to be recursive for boxes
-        moving into other boxes.
+        """Moves an object on the map, pushing any boxes in the way.
 
         Args:
             direction (str): The direction the object is moving.
             coords (tuple[int, int]): The coordinates of the object to be moved.
         """
-        objectSymbol = self.warehouse[coords[1]][coords[0]]
-        def move_object_helper(newCoords: tuple[int, int]):
-            """Helps with moving the object based on the direction.
-
-            Args:
-                newCoords (tuple[int, int]): The coordinates the object is destined to.
-            """
-            if self.warehouse[newCoords[1]][newCoords[0]] == ".":
-                self.warehouse[coords[1]][coords[0]] = "."
-                if objectSymbol == "@":
-                    self.robotPos = newCoords
-                self.warehouse[newCoords[1]][newCoords[0]] = objectSymbol
-            elif self.warehouse[newCoords[1]][newCoords[0]] == "O":
-                self.move_object(direction, newCoords)
-                if self.warehouse[newCoords[1]][newCoords[0]] != "O":
-                    self.move_object(direction, coords)
-        match direction:
-            case "^":
-                newCoords = (coords[0], coords[1]-1)
-                move_object_helper(newCoords)
-            case ">":
-                newCoords = (coords[0]+1, coords[1])
-                move_object_helper(newCoords)
-            case "v":
-                newCoords = (coords[0], coords[1]+1)
-                move_object_helper(newCoords)
-            case "<":
-                newCoords = (coords[0]-1, coords[1])
-                move_object_helper(newCoords)
-            case "_":
-                print("Invalid direction")
-
-    def execute_commands(self, commands: str):
-        """Executes the given string of commands.
+        delta = self.deltas.get(direction)
+        if delta is None:
+            print("Invalid direction")
+            return
+        self.push(coords[1] * self.width + coords[0], delta)
+
+    def execute_commands(self, commands: str, scoreInterval: int | None = None) -> list[int] | None:
+        """Executes the given string of commands. Anything that is not a direction is skipped. Runs of the
+        same direction are done as a single slide instead of one push at a time.
 
         Args:
             commands (str): The commands to execute.
+            scoreInterval (int | None, optional): Record the GPS sum after every this many commands. Defaults to None.
+
+        Returns:
+            list[int] | None: The GPS sums recorded every scoreInterval commands if one was given.
         """
-        for command in commands:
-            self.move_object(command, self.robotPos)
+        deltas = self.deltas
+        scores = [] if scoreInterval else None
+        numCommands = 0
+        i = 0
+        while i < len(commands):
+            command = commands[i]
+            runEnd = i + 1
+            while runEnd < len(commands) and commands[runEnd] == command:
+                runEnd += 1
+            delta = deltas.get(command)
+            if delta is None:
+                i = runEnd
+                continue
+            runLength = runEnd - i
+            if scores is not None: # Stop the run at the next recording point
+                runLength = min(runLength, scoreInterval - numCommands % scoreInterval)
+            if runLength == 1:
+                self.push(self.robotIndex, delta)
+            else:
+                self.slide(self.robotIndex, delta, runLength)
+            numCommands += runLength
+            i += runLength
+            if scores is not None and numCommands % scoreInterval == 0:
+                scores.append(self.gpsSum)
+        return scores
 
     def box_coordinate_values(self) -> int:
-        """Calculates the sum of all of the box GPS coordinate values.
+        """Gets the sum of all of the box GPS coordinate values. This is kept up to date as boxes move so
+        it can be read at any point in the simulation.
 
         Returns:
             int: THe value of the sum of all of the box GPS coordinate values.
         """
-        sum = 0
-        for row in range(len(self.warehouse)):
-            for col in range(len(self.warehouse[row])):
-                if self.warehouse[row][col] == "O":
-                    sum += (100 * row) + col
-        return sum
+        return self.gpsSum
         
 class WideWarehouseRobotMap(WarehouseRobotMap):
     """The wide WideWarehouseRobotMap which inherits from the base WarehouseRobotMap.
     """
+    boxSymbol = BOX_LEFT
+
     def __init__(self, warehouseText: list[str]):
         """The initializer for WideWarehouseRobotMap which uses the input text
         to create the map.
@@ -103,185 +299,302 @@ class WideWarehouseRobotMap(WarehouseRobotMap):
         Args:
             warehouseText (list[str]): The input text used to create the map.
         """
-        self.warehouse = []
-        self.robotPos = ()
-        x = 0
-        y = 0
-        for line in warehouseText:
-            row = []
-            for char in line:
-                match char:
-                    case "O":
-                        row.append("[")
-                        row.append("]")
-                        x += 2
-                    case "#":
-                        row.append("#")
-                        row.append("#")
-                        x += 2
-                    case ".":
-                        row.append(".")
-                        row.append(".")
-                        x += 2
-                    case "@":
-                        self.robotPos = (x, y)
-                        row.append("@")
-                        row.append(".")
-                        x += 2
-            x = 0
-            y += 1 
-            self.warehouse.append(row)
-        
-    def __repr__(self) -> str:
-        """Created so the map can be printed.
+        self.load_grid([line.translate(WIDE_TILES) for line in warehouseText])
+
+    def push(self, index: int, delta: int) -> bool:
+        """Pushes the object at the index one cell along the offset. Sideways pushes scan ahead over the box
+        halves to the first cell that is not a box and shift the whole run over by one. Vertical pushes are
+        planned first with a breadth first search over the rows, collecting every box half that would move.
+        If any of them would hit a wall nothing moves, otherwise the moves are all made at once starting from
+        the row farthest away so no cell is overwritten before it has moved.
+
+        Args:
+            index (int): The index of the object to push.
+            delta (int): The offset of the direction to push in.
 
         Returns:
-            str: The string to be printed when instance of class is printed.
+            bool: Whether or not the object moved.
         """
-        retStr = ""
-        for row in range(len(self.warehouse)):
-            for col in range(len(self.warehouse[row])):
-                retStr += self.warehouse[row][col]
-            retStr += "\n"
-        return retStr
-    
-    # ISSUE: WORKS FOR EXAMPLES BUT OFF BY A LITTLE ON THE ACTUAL DAY 15 INPUT TEXT FOR PART 2
-    def move_object(self, direction: str, coords: tuple[int, int]):
-        """Moves an object in a given direction from the coords.
+        grid = self.grid
+        if delta == 1 or delta == -1:
+            end = index + delta
+            while grid[end] == BOX_LEFT or grid[end] == BOX_RIGHT:
+                end += delta
+            if grid[end] != EMPTY:
+                return False
+            self.move_boxes([cell for cell in range(index, end, delta) if grid[cell] == BOX_LEFT], delta)
+            if delta == 1:
+                grid[index+1:end+1] = grid[index:end]
+            else:
+                grid[end:index] = grid[end+1:index+1]
+            if self.changedCells is not None:
+                self.changedCells.extend(range(index, end + delta, delta))
+        else:
+            rows = []
+            row = [index]
+            seen = {index}
+            while row:
+                rows.append(row)
+                nextRow = []
+                for cell in row:
+                    target = cell + delta
+                    if grid[target] == WALL:
+                        return False
+                    if grid[target] == BOX_LEFT:
+                        halves = (target, target + 1)
+                    elif grid[target] == BOX_RIGHT:
+                        halves = (target - 1, target)
+                    else:
+                        continue
+                    for half in halves:
+                        if half not in seen:
+                            seen.add(half)
+                            nextRow.append(half)
+                row = nextRow
+            self.move_boxes([cell for row in rows for cell in row if grid[cell] == BOX_LEFT], delta)
+            for row in reversed(rows):
+                for cell in row:
+                    grid[cell+delta] = grid[cell]
+                    grid[cell] = EMPTY
+            if self.changedCells is not None:
+                for cell in seen:
+                    self.changedCells.extend((cell, cell + delta))
+        grid[index] = EMPTY
+        if index == self.robotIndex:
+            self.robotIndex = index + delta
+        return True
+
+    def slide(self, index: int, delta: int, count: int) -> int:
+        """Pushes the object at the index along the offset count times. Sideways this is the same single scan as
+        the narrow map since box halves keep their order, but vertical pushes can fan out so they are done one
+        at a time.
 
         Args:
-            direction (str): The direction to move the object.
-            coords (tuple[int, int]): The starting coordinates of the object.
+            index (int): The index of the object to push.
+            delta (int): The offset of the direction to push in.
+            count (int): The number of times to push.
+
+        Returns:
+            int: The number of cells the object actually moved.
         """
-        objectSymbol = self.warehouse[coords[1]][coords[0]]
-        def move_object_helper(newCoords: tuple[int, int]):
-            """Helper for the move object function which does the moving.
-
-            Args:
-                newCoords (tuple[int, int]): The new coordinates of the object to move to.
-            """
-            if self.warehouse[newCoords[1]][newCoords[0]] == ".":
-                self.warehouse[coords[1]][coords[0]] = "."
-                if objectSymbol == "@":
-                    self.robotPos = newCoords
-                self.warehouse[newCoords[1]][newCoords[0]] = objectSymbol
-            elif self.warehouse[newCoords[1]][newCoords[0]] == "[":
-                move_wide_object(newCoords, (newCoords[0]+1, newCoords[1]))
-                if self.warehouse[newCoords[1]][newCoords[0]] != "[":
-                    self.move_object(direction, coords)
-            elif self.warehouse[newCoords[1]][newCoords[0]] == "]":
-                move_wide_object((newCoords[0]-1, newCoords[1]), newCoords)
-                if self.warehouse[newCoords[1]][newCoords[0]] != "]":
-                    self.move_object(direction, coords)
-        def move_wide_object(leftCoords: tuple[int, int], rightCoords: tuple[int, int]):
-            """Used to move a wide object such as a box.
-
-            Args:
-                leftCoords (tuple[int, int]): The left coordinates of the wide object.
-                rightCoords (tuple[int, int]): The right coordinates of the wide object.
-            """
-            leftObjectSymbol = self.warehouse[leftCoords[1]][leftCoords[0]]
-            rightObjectSymbol = self.warehouse[rightCoords[1]][rightCoords[0]]
-            def move_wide_object_helper(newLeftCoords: tuple[int, int], newRightCoords: tuple[int, int]):
-                """Helper for the wide object move function which does the moving.
-
-                Args:
-                    newLeftCoords (tuple[int, int]): The left coordinates of the wide object.
-                    newRightCoords (tuple[int, int]): The right coordinates of the wide object.
-                """
-                if direction == ">" and self.warehouse[newRightCoords[1]][newRightCoords[0]] == ".":
-                    self.warehouse[leftCoords[1]][leftCoords[0]] = "."
-                    self.warehouse[rightCoords[1]][rightCoords[0]] = "."
-
-                    self.warehouse[newLeftCoords[1]][newLeftCoords[0]] = leftObjectSymbol
-                    self.warehouse[newRightCoords[1]][newRightCoords[0]] = rightObjectSymbol
-                elif direction == "<" and self.warehouse[newLeftCoords[1]][newLeftCoords[0]] == ".":
-                    self.warehouse[leftCoords[1]][leftCoords[0]] = "."
-                    self.warehouse[rightCoords[1]][rightCoords[0]] = "."
-
-                    self.warehouse[newLeftCoords[1]][newLeftCoords[0]] = leftObjectSymbol
-                    self.warehouse[newRightCoords[1]][newRightCoords[0]] = rightObjectSymbol
-                elif (direction == "^" or direction == "v") and self.warehouse[newRightCoords[1]][newRightCoords[0]] == "." and self.warehouse[newLeftCoords[1]][newLeftCoords[0]] == ".":
-                    self.warehouse[leftCoords[1]][leftCoords[0]] = "."
-                    self.warehouse[rightCoords[1]][rightCoords[0]] = "."
-
-                    self.warehouse[newLeftCoords[1]][newLeftCoords[0]] = leftObjectSymbol
-                    self.warehouse[newRightCoords[1]][newRightCoords[0]] = rightObjectSymbol
-                elif direction == ">" and self.warehouse[newRightCoords[1]][newRightCoords[0]] == "[":
-                    move_wide_object(newRightCoords, (newRightCoords[0]+1, newRightCoords[1]))
-                    if self.warehouse[newRightCoords[1]][newRightCoords[0]] != "[":
-                        move_wide_object(leftCoords, rightCoords)
-                elif direction == "<" and self.warehouse[newLeftCoords[1]][newLeftCoords[0]] == "]":
-                    move_wide_object((newLeftCoords[0]-1, newRightCoords[1]), newLeftCoords)
-                    if self.warehouse[newLeftCoords[1]][newLeftCoords[0]] != "]":
-                        move_wide_object(leftCoords, rightCoords)
-                elif (direction == "^" or direction == "v") and self.warehouse[newRightCoords[1]][newRightCoords[0]] in "[]":
-                    if self.warehouse[newRightCoords[1]][newRightCoords[0]] == "[":
-                        move_wide_object(newRightCoords, (newRightCoords[0]+1, newRightCoords[1]))
-                    else:
-                        move_wide_object((newRightCoords[0]-1, newRightCoords[1]), newRightCoords)
-                    if self.warehouse[newRightCoords[1]][newRightCoords[0]] not in "[]":
-                        move_wide_object(leftCoords, rightCoords)
-                elif (direction == "^" or direction == "v") and self.warehouse[newLeftCoords[1]][newLeftCoords[0]] in "[]":
-                    if self.warehouse[newLeftCoords[1]][newLeftCoords[0]] == "[":
-                        move_wide_object(newLeftCoords, (newLeftCoords[0]+1, newLeftCoords[1]))
-                    else:
-                        move_wide_object((newLeftCoords[0]-1, newLeftCoords[1]), newLeftCoords)
-                    if self.warehouse[newLeftCoords[1]][newLeftCoords[0]] not in "[]":
-                        move_wide_object(leftCoords, rightCoords)
-            match direction:
-                case "^":
-                    newLeftCoords = (leftCoords[0], leftCoords[1]-1)
-                    newRightCoords = (rightCoords[0], rightCoords[1]-1)
-                    move_wide_object_helper(newLeftCoords, newRightCoords)
-                case ">":
-                    newLeftCoords = (leftCoords[0]+1, leftCoords[1])
-                    newRightCoords = (rightCoords[0]+1, rightCoords[1])
-                    move_wide_object_helper(newLeftCoords, newRightCoords)
-                case "v":
-                    newLeftCoords = (leftCoords[0], leftCoords[1]+1)
-                    newRightCoords = (rightCoords[0], rightCoords[1]+1)
-                    move_wide_object_helper(newLeftCoords, newRightCoords)
-                case "<":
-                    newLeftCoords = (leftCoords[0]-1, leftCoords[1])
-                    newRightCoords = (rightCoords[0]-1, rightCoords[1])
-                    move_wide_object_helper(newLeftCoords, newRightCoords)
-                case "_":
-                    print("Invalid direction")
-        match direction:
-            case "^":
-                newCoords = (coords[0], coords[1]-1)
-                move_object_helper(newCoords)
-            case ">":
-                newCoords = (coords[0]+1, coords[1])
-                move_object_helper(newCoords)
-            case "v":
-                newCoords = (coords[0], coords[1]+1)
-                move_object_helper(newCoords)
-            case "<":
-                newCoords = (coords[0]-1, coords[1])
-                move_object_helper(newCoords)
-            case "_":
-                print("Invalid direction")
+        if delta == 1 or delta == -1:
+            return super().slide(index, delta, count)
+        for numMoved in range(count):
+            if not self.push(index, delta):
+                return numMoved
+            index += delta
+        return count
 
-    def box_coordinate_values(self) -> int:
-        """Calculates the sum of the GPS coordinate values of the boxes.
+class ReplayRecorder():
+    """Records a simulation to a compact binary replay file. The starting state and every keyframeInterval
+    commands after it are stored as full keyframes and every other command only stores the cells it changed.
+    """
+    def __init__(self, warehouse: WarehouseRobotMap, path: str, keyframeInterval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """The ReplayRecorder initializer which opens the replay file and writes the starting state.
+
+        Args:
+            warehouse (WarehouseRobotMap): The warehouse to record, either narrow or wide.
+            path (str): The path of the replay file to write.
+            keyframeInterval (int, optional): The number of commands between full keyframes. Defaults to DEFAULT_KEYFRAME_INTERVAL.
+        """
+        self.warehouse = warehouse
+        self.keyframeInterval = keyframeInterval
+        self.numCommands = 0
+        self.file = open(path, "wb")
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, warehouse.width, warehouse.height, keyframeInterval))
+        self.file.write(bytes([KEYFRAME]) + warehouse.grid)
+        warehouse.changedCells = []
+
+    def __enter__(self) -> "ReplayRecorder":
+        """Lets the ReplayRecorder be used in a with statement.
 
         Returns:
-            int: The sum of the GPS coordinate values of the boxes.
+            ReplayRecorder: This ReplayRecorder.
         """
-        sum = 0
-        for row in range(len(self.warehouse)):
-            for col in range(len(self.warehouse[row])):
-                if self.warehouse[row][col] == "[":
-                    sum += ((100 * row) + col)
-        return sum
+        return self
 
-if __name__ == "__main__":
+    def __exit__(self, *_):
+        """Closes the replay file when leaving the with statement.
+        """
+        self.close()
+
+    def record_commands(self, commands: str):
+        """Executes the commands one at a time, writing a frame after each one. Anything that is not a
+        direction is skipped.
+
+        Args:
+            commands (str): The commands to execute.
+        """
+        warehouse = self.warehouse
+        grid = warehouse.grid
+        for command in commands:
+            delta = warehouse.deltas.get(command)
+            if delta is None:
+                continue
+            warehouse.push(warehouse.robotIndex, delta)
+            self.numCommands += 1
+            if self.numCommands % self.keyframeInterval == 0:
+                self.file.write(bytes([KEYFRAME]) + grid)
+            else:
+                changed = set(warehouse.changedCells)
+                frame = bytearray([DELTA_FRAME]) + FRAME_COUNT.pack(len(changed))
+                for cell in changed:
+                    frame += CHANGED_CELL.pack(cell, grid[cell])
+                self.file.write(frame)
+            warehouse.changedCells.clear()
+
+    def close(self):
+        """Stops recording and closes the replay file.
+        """
+        self.warehouse.changedCells = None
+        self.file.close()
+
+class ReplayReader():
+    """Reads a replay file written by ReplayRecorder and rebuilds the warehouse after any command.
+    """
+    def __init__(self, path: str):
+        """The ReplayReader initializer which reads the header and finds where every frame starts.
+
+        Args:
+            path (str): The path of the replay file to read.
+        """
+        self.file = open(path, "rb")
+        (magic, self.width, self.height, self.keyframeInterval) = REPLAY_HEADER.unpack(self.file.read(REPLAY_HEADER.size))
+        if magic != REPLAY_MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a day 15 replay file")
+        self.frameOffsets = []
+        gridSize = self.width * self.height
+        offset = REPLAY_HEADER.size
+        while frameType := self.file.read(1):
+            self.frameOffsets.append(offset)
+            if frameType[0] == KEYFRAME:
+                offset += 1 + gridSize
+            else:
+                (numChanged,) = FRAME_COUNT.unpack(self.file.read(FRAME_COUNT.size))
+                offset += 1 + FRAME_COUNT.size + numChanged * CHANGED_CELL.size
+            self.file.seek(offset)
+
+    def __enter__(self) -> "ReplayReader":
+        """Lets the ReplayReader be used in a with statement.
+
+        Returns:
+            ReplayReader: This ReplayReader.
+        """
+        return self
+
+    def __exit__(self, *_):
+        """Closes the replay file when leaving the with statement.
+        """
+        self.close()
+
+    def __len__(self) -> int:
+        """The number of frames, which is one more than the number of commands recorded.
+
+        Returns:
+            int: The number of frames.
+        """
+        return len(self.frameOffsets)
+
+    def grid_at(self, commandIndex: int) -> bytearray:
+        """Rebuilds the grid after the given number of commands by loading the keyframe at or before it and
+        applying the changed cells of the frames in between.
+
+        Args:
+            commandIndex (int): The number of commands executed, where 0 is the starting state.
+
+        Returns:
+            bytearray: The flat grid at that point.
+        """
+        if not 0 <= commandIndex < len(self.frameOffsets):
+            raise IndexError(f"Command index {commandIndex} is not in the replay")
+        keyframeIndex = commandIndex - commandIndex % self.keyframeInterval
+        self.file.seek(self.frameOffsets[keyframeIndex] + 1)
+        grid = bytearray(self.file.read(self.width * self.height))
+        for frameIndex in range(keyframeIndex + 1, commandIndex + 1):
+            self.file.seek(self.frameOffsets[frameIndex] + 1)
+            (numChanged,) = FRAME_COUNT.unpack(self.file.read(FRAME_COUNT.size))
+            for (cell, value) in CHANGED_CELL.iter_unpack(self.file.read(numChanged * CHANGED_CELL.size)):
+                grid[cell] = value
+        return grid
+
+    def render(self, commandIndex: int) -> str:
+        """Renders the map after the given number of commands.
+
+        Args:
+            commandIndex (int): The number of commands executed, where 0 is the starting state.
+
+        Returns:
+            str: The printable map.
+        """
+        return render_grid(self.grid_at(commandIndex), self.width)
+
+    def close(self):
+        """Closes the replay file.
+        """
+        self.file.close()
+
+def attach_base_grids(narrowGrid: bytes, narrowWidth: int, wideGrid: bytes, wideWidth: int):
+    """Worker initializer that keeps the starting grids for simulate_scenario. The grids are immutable
+    bytes so on platforms that fork they are shared copy-on-write with the parent instead of copied.
+
+    Args:
+        narrowGrid (bytes): The flat starting grid of the narrow warehouse.
+        narrowWidth (int): The width of the narrow warehouse.
+        wideGrid (bytes): The flat starting grid of the wide warehouse.
+        wideWidth (int): The width of the wide warehouse.
+    """
+    global baseGrids
+    baseGrids = (narrowGrid, narrowWidth, wideGrid, wideWidth)
+
+def simulate_scenario(commands: str) -> tuple[int, int]:
+    """Runs one command stream on fresh copies of the narrow and wide starting grids.
+
+    Args:
+        commands (str): The commands to execute.
+
+    Returns:
+        tuple[int, int]: The final GPS sums of the narrow and the wide warehouse.
+    """
+    (narrowGrid, narrowWidth, wideGrid, wideWidth) = baseGrids
+    warehouse = WarehouseRobotMap.from_grid(narrowGrid, narrowWidth)
+    wideWarehouse = WideWarehouseRobotMap.from_grid(wideGrid, wideWidth)
+    warehouse.execute_commands(commands)
+    wideWarehouse.execute_commands(commands)
+    return (warehouse.box_coordinate_values(), wideWarehouse.box_coordinate_values())
+
+def simulate_scenarios(warehouseText: list[str], commandStreams: list[str], numWorkers: int | None = None) -> list[tuple[int, int]]:
+    """Simulates many independent command streams against the same starting warehouse. The text is parsed
+    into flat narrow and wide grids once, handed to every worker process once, and each stream then clones them.
+
+    Args:
+        warehouseText (list[str]): The input text of the starting warehouse.
+        commandStreams (list[str]): The command streams to simulate.
+        numWorkers (int | None, optional): The number of worker processes. Defaults to None which uses the CPU count.
+
+    Returns:
+        list[tuple[int, int]]: The final narrow and wide GPS sums for each command stream, in order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    warehouse = WarehouseRobotMap(warehouseText)
+    wideWarehouse = WideWarehouseRobotMap(warehouseText)
+    baseGridArgs = (bytes(warehouse.grid), warehouse.width, bytes(wideWarehouse.grid), wideWarehouse.width)
+    with ProcessPoolExecutor(max_workers=numWorkers, initializer=attach_base_grids, initargs=baseGridArgs) as executor:
+        return list(executor.map(simulate_scenario, commandStreams))
+
+def read_input(path: str) -> tuple[list[str], str]:
+    """Reads the warehouse map and the commands from the input file.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        tuple[list[str], str]: The rows of the warehouse map and the commands.
+    """
     warehouseData = []
     moves = ""
     warehouseActive = True
-    with open("./Data/day15.txt", "r") as file:
+    with open(path, "r") as file:
         for line in file:
             if line == "\n":
                 warehouseActive = False
@@ -290,6 +603,38 @@ if __name__ == "__main__":
                 warehouseData.append(line.strip())
             else:
                 moves += line.strip()
+    return (warehouseData, moves)
+
+def part1(data: tuple[list[str], str]) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        data (tuple[list[str], str]): The warehouse map and commands from read_input.
+
+    Returns:
+        int: The GPS coordinate sum of all the boxes.
+    """
+    (warehouseData, moves) = data
+    warehouse = WarehouseRobotMap(warehouseData)
+    warehouse.execute_commands(moves)
+    return warehouse.box_coordinate_values()
+
+def part2(data: tuple[list[str], str]) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        data (tuple[list[str], str]): The warehouse map and commands from read_input.
+
+    Returns:
+        int: The GPS coordinate sum of all the boxes in the wide warehouse.
+    """
+    (warehouseData, moves) = data
+    wideWarehouse = WideWarehouseRobotMap(warehouseData)
+    wideWarehouse.execute_commands(moves)
+    return wideWarehouse.box_coordinate_values()
+
+if __name__ == "__main__":
+    (warehouseData, moves) = read_input("./Data/day15.txt")
     warehouse = WarehouseRobotMap(warehouseData)
     wideWarehouse = WideWarehouseRobotMap(warehouseData)
     warehouse.execute_commands(moves)
@@ -297,4 +642,4 @@ if __name__ == "__main__":
     gpsSum = warehouse.box_coordinate_values()
     wideGPSSum = wideWarehouse.box_coordinate_values()
     print(f"(Part 1) The GPS coordinate sum of all the boxes is: {gpsSum}")
-    print(f"(Part 2) The GPS coordinate sum of all the boxes in the wide warehouse is: {wideGPSSum}") # NOTE: Correct answer for part 2 for day15 prompt is 1521635. This implementation is currently not equipped for it but it does work for the examples.
+    print(f"(Part 2) The GPS coordinate sum of all the boxes in the wide warehouse is: {wideGPSSum}")
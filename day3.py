@@ -1,4 +1,16 @@
+import mmap
+import os
 import re
+from typing import Iterable, Iterator
+
+# CONSTANTS
+INSTRUCTION_PATTERN = r"mul\(\s*([+-]?\d+)\s*,\s*([+-]?\d+)\s*\)|do\(\)|don't\(\)"
+INSTRUCTION_REGEX = re.compile(INSTRUCTION_PATTERN)
+INSTRUCTION_BYTES_REGEX = re.compile(INSTRUCTION_PATTERN.encode())
+DO_LENGTH = len("do()")
+PARALLEL_CHUNK_SIZE = 64 * 1024 * 1024 # Bytes of the file each worker task scans
+PARALLEL_THRESHOLD_BYTES = 256 * 1024 * 1024 # Files larger than this are scanned across processes
+
 def decipher_mul(expression: str) -> list[str]:
     # Takes the corrupted expression and returns the result
     pattern = "mul\(\s*[+-]?\d+\s*,\s*[+-]?\d+\s*\)"
@@ -41,18 +53,182 @@ def handle_conditionals(expression: str) -> str:
             result.replace("do()", "")
     return result
 
-        
 
 
+def tally_instructions(matches: Iterator[re.Match], enabled: bool = True) -> tuple[int, int, bool]:
+    """Walks the matched mul(), do() and don't() instructions in order keeping track of whether
+    muls are enabled. Works for matches over both str and bytes.
+
+    Args:
+        matches (Iterator[re.Match]): The instruction matches in the order they appear.
+        enabled (bool, optional): Whether muls are enabled before the first match. Defaults to True.
+
+    Returns:
+        tuple[int, int, bool]: The sum of all muls, the sum of the enabled muls and whether muls are enabled after the last match.
+    """
+    sumMul = 0
+    conditionalSumMul = 0
+    for match in matches:
+        if match.lastindex: # Only mul has the operand groups
+            product = int(match.group(1)) * int(match.group(2))
+            sumMul += product
+            if enabled:
+                conditionalSumMul += product
+        else:
+            enabled = (match.end() - match.start()) == DO_LENGTH
+    return (sumMul, conditionalSumMul, enabled)
+
+def scan_chunks(chunks: Iterable[str]) -> tuple[int, int]:
+    """Calculates the part 1 and part 2 sums in one pass over the corrupted memory as it arrives
+    in chunks. Whatever could be the start of an instruction cut off by the end of a chunk is 
+    carried over to the next one. Every instruction starts with "m" or "d" and has no other "m" or "d"
+    in it so the cut off part always starts at the last one of those after the final match.
+
+    Args:
+        chunks (Iterable[str]): The pieces of corrupted memory in order.
+
+    Returns:
+        tuple[int, int]: The sum of all multiplications and the sum of the enabled multiplications.
+    """
+    sumMul = 0
+    conditionalSumMul = 0
+    enabled = True
+    carry = ""
+    for chunk in chunks:
+        buffer = carry + chunk
+        matches = list(INSTRUCTION_REGEX.finditer(buffer)) # Bounded by the chunk size
+        lastEnd = matches[-1].end() if matches else 0
+        (chunkSum, chunkConditionalSum, enabled) = tally_instructions(iter(matches), enabled)
+        sumMul += chunkSum
+        conditionalSumMul += chunkConditionalSum
+        partialStart = max(buffer.rfind("m", lastEnd), buffer.rfind("d", lastEnd))
+        carry = buffer[partialStart:] if partialStart != -1 else ""
+    (carrySum, carryConditionalSum, enabled) = tally_instructions(INSTRUCTION_REGEX.finditer(carry), enabled)
+    return (sumMul + carrySum, conditionalSumMul + carryConditionalSum)
+
+def scan_memory_file(path: str) -> tuple[int, int]:
+    """Calculates the part 1 and part 2 sums in one pass by running the instruction regex directly
+    over a memory-mapped view of the file so it is never read into a string.
+
+    Args:
+        path (str): The path to the corrupted memory file.
+
+    Returns:
+        tuple[int, int]: The sum of all multiplications and the sum of the enabled multiplications.
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0: # mmap can not map an empty file
+            return (0, 0)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as memory:
+            (sumMul, conditionalSumMul, _) = tally_instructions(INSTRUCTION_BYTES_REGEX.finditer(memory))
+    return (sumMul, conditionalSumMul)
+
+def scan_memory_range(path: str, start: int, end: int) -> tuple[int, int, int, bool | None]:
+    """Scans the instructions that start within a byte range of the file. An instruction that starts
+    in the range but runs past the end of it still belongs to this range, and no instruction can
+    start inside another one, so neighbouring ranges never miss or double count anything. Since the
+    enabled state at the start of the range is not known yet, the enabled sum is returned for both
+    possibilities.
+
+    Args:
+        path (str): The path to the corrupted memory file.
+        start (int): The first byte of the range.
+        end (int): The byte just past the end of the range.
+
+    Returns:
+        tuple[int, int, int, bool | None]: The sum of all muls in the range, the enabled sum if the range starts enabled,
+        the enabled sum if the range starts disabled and the state left by the last do() or don't(). The state is None
+        if the range has neither.
+    """
+    sumMul = 0
+    prefixSum = 0 # Muls before the first do() or don't() which only count when starting enabled
+    conditionalSumMul = 0
+    enabled = None
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as memory:
+            for match in INSTRUCTION_BYTES_REGEX.finditer(memory, start):
+                if match.start() >= end:
+                    break
+                if match.lastindex:
+                    product = int(match.group(1)) * int(match.group(2))
+                    sumMul += product
+                    if enabled is None:
+                        prefixSum += product
+                    elif enabled:
+                        conditionalSumMul += product
+                else:
+                    enabled = (match.end() - match.start()) == DO_LENGTH
+    return (sumMul, prefixSum + conditionalSumMul, conditionalSumMul, enabled)
+
+def scan_memory_file_parallel(path: str, numWorkers: int | None = None, chunkSize: int = PARALLEL_CHUNK_SIZE) -> tuple[int, int]:
+    """Calculates the part 1 and part 2 sums by scanning byte ranges of the file across a process pool
+    and then folding the ranges together in order, picking each range's enabled sum based on the
+    state the ranges before it left off in.
+
+    Args:
+        path (str): The path to the corrupted memory file.
+        numWorkers (int | None, optional): The number of worker processes. Defaults to None which uses the CPU count.
+        chunkSize (int, optional): The number of bytes in each range. Defaults to PARALLEL_CHUNK_SIZE.
+
+    Returns:
+        tuple[int, int]: The sum of all multiplications and the sum of the enabled multiplications.
+    """
+    from concurrent.futures import ProcessPoolExecutor # Only files over PARALLEL_THRESHOLD_BYTES are scanned in parallel, so the pool is rarely needed
+    size = os.path.getsize(path)
+    if size == 0:
+        return (0, 0)
+    starts = list(range(0, size, chunkSize))
+    ends = [min(start + chunkSize, size) for start in starts]
+    sumMul = 0
+    conditionalSumMul = 0
+    enabled = True
+    with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+        for (rangeSum, ifEnabledSum, ifDisabledSum, endState) in executor.map(scan_memory_range, [path] * len(starts), starts, ends):
+            sumMul += rangeSum
+            conditionalSumMul += ifEnabledSum if enabled else ifDisabledSum
+            if endState is not None:
+                enabled = endState
+    return (sumMul, conditionalSumMul)
+
+def read_input(path: str) -> str:
+    """Reads the input for the aoc runner.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        str: The corrupted memory.
+    """
+    with open(path, "r") as file:
+        return file.read()
+
+def part1(expression: str) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        expression (str): The corrupted memory from read_input.
+
+    Returns:
+        int: The sum of all multiplications.
+    """
+    return scan_chunks((expression,))[0]
+
+def part2(expression: str) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        expression (str): The corrupted memory from read_input.
+
+    Returns:
+        int: The sum of the enabled multiplications.
+    """
+    return scan_chunks((expression,))[1]
+
 if __name__ == "__main__":
-    expressions = ""
-    with open("./Data/day3.txt", "r") as file:
-        for line in file:
-            expressions += line
-    conditionalExpression = handle_conditionals(expressions)
-    sumMul = determine_sum_mul(expressions)
-    conditionalSumMul = determine_sum_mul(conditionalExpression)
+    path = "./Data/day3.txt"
+    if os.path.getsize(path) > PARALLEL_THRESHOLD_BYTES:
+        (sumMul, conditionalSumMul) = scan_memory_file_parallel(path)
+    else:
+        (sumMul, conditionalSumMul) = scan_memory_file(path)
     print(f"(Part 1) Sum of multiplications: {sumMul}")
     print(f"(Part 2) Sum of enabled multiplications: {conditionalSumMul}")
-
-    
\ No newline at end of file
@@ -1,21 +1,34 @@
+from collections import deque
+from typing import Iterable
+
+def index_rules(rules: dict[list[int]]) -> dict[int, frozenset[int]]:
+    """Compiles the parsed rules once into a set of the pages that must come after each page so
+    membership checks against them are constant time.
+
+    Args:
+        rules (dict[list[int]]): The rules as parsed, mapping a page to the pages that must come after it.
+
+    Returns:
+        dict[int, frozenset[int]]: The rule index, mapping a page to the set of pages that must come after it.
+    """
+    return {page: frozenset(after) for page, after in rules.items()}
+
 def determine_correct(rules: dict[list[int]], sequence: list[int]) -> bool:
     """Determines whether or not the given sequence is in the correct order according to the supplied rules.
 
     Args:
-        rules (dict[list[int]]): The rules of the sequence. 
+        rules (dict[list[int]]): The rules of the sequence. This can be the index from index_rules.
         sequence (list[int]): The sequence to check.
 
     Returns:
         bool: Whether or not the sequence is in the correct order.
     """
-    prev = []
+    seen = set()
     for item in sequence:
-        for prevItem in prev:
-            if item not in rules:
-                continue
-            if prevItem in rules[item]:
-                return False
-        prev.append(item)
+        # Any page already seen that this one is supposed to come before breaks the order
+        if item in rules and not seen.isdisjoint(rules[item]):
+            return False
+        seen.add(item)
     return True
 
 def get_correct_indexes(rules: dict[list[int]], sequences: list[list[int]]) -> tuple[list[int], list[int]]:
@@ -64,21 +77,77 @@ def fix_incorrect_sequence(rules: dict[list[int]], sequence: list[int]) -> list[
     Returns:
         list[int]: The reordered list that satisifies the ordering criteria.
     """
-    if determine_correct(rules, sequence):
-        return sequence
-    prev = []
-    for item in sequence:
-        for prevItem in prev:
-            if item not in rules:
-                continue
-            if prevItem in rules[item]:
-                index = sequence.index(item)
-                prevIndex = sequence.index(prevItem)
-                sequence.pop(prevIndex)
-                sequence.insert(index, prevItem)
-        prev.append(item)
-    return fix_incorrect_sequence(rules, sequence)
-        
+    # A topological sort of the rules between just these pages. Sorting with the rules as a comparison
+    # doesn't work since pages with no rule between them make the comparison inconsistent.
+    positions = {}
+    for i, page in enumerate(sequence):
+        positions.setdefault(page, []).append(i)
+    after = [[] for _ in sequence]
+    numBefore = [0] * len(sequence)
+    for i, page in enumerate(sequence):
+        for nextPage in rules.get(page, ()):
+            for j in positions.get(nextPage, ()):
+                after[i].append(j)
+                numBefore[j] += 1
+    ready = deque(i for i in range(len(sequence)) if numBefore[i] == 0) # Kept in the original order so the result is stable
+    order = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for j in after[i]:
+            numBefore[j] -= 1
+            if numBefore[j] == 0:
+                ready.append(j)
+    if len(order) < len(sequence): # The rules between these pages loop so keep the rest where they were
+        placed = set(order)
+        order.extend(i for i in range(len(sequence)) if i not in placed)
+    sequence[:] = [sequence[i] for i in order]
+    return sequence
+
+def fixed_middle_page(rules: dict[list[int]], sequence: list[int]) -> int:
+    """Finds the page that ends up in the middle of the sequence once it is fixed without actually
+    sorting it. When the rules give a consistent order between every pair of pages in the sequence, the
+    pages have 0 to k - 1 of the other pages required to come after them and the middle page is the one
+    with exactly as many as there are spots after the middle. Otherwise the sequence is fixed for real.
+
+    Args:
+        rules (dict[list[int]]): The rules the sequence need to follow in terms of ordering. Ideally the index from index_rules.
+        sequence (list[int]): The sequence to find the middle page of.
+
+    Returns:
+        int: The page in the middle of the fixed sequence.
+    """
+    pages = set(sequence)
+    middleIndex = len(sequence) // 2
+    numAfterMiddle = len(sequence) - 1 - middleIndex
+    middlePage = None
+    numAfterSeen = set()
+    for page in sequence:
+        numAfter = len(pages.intersection(rules[page])) if page in rules else 0
+        numAfterSeen.add(numAfter)
+        if numAfter == numAfterMiddle:
+            middlePage = page
+    if len(pages) == len(sequence) and len(numAfterSeen) == len(sequence):
+        return middlePage
+    # The rules do not give a total order of the pages so fall back to fixing a copy
+    return fix_incorrect_sequence(rules, list(sequence))[middleIndex]
+
+def sum_fixed_middle_pages(rules: dict[list[int]], sequences: list[list[int]], indexes: list[int]) -> int:
+    """Adds together the middle pages the sequences at the indexes would have once fixed, without 
+    fixing them.
+
+    Args:
+        rules (dict[list[int]]): The ordering rules each sequence needs to follow.
+        sequences (list[list[int]]): The list of all of the sequences.
+        indexes (list[int]): The indexes of the sequences to add the fixed middle pages of.
+
+    Returns:
+        int: The sum of the middle pages of the fixed sequences.
+    """
+    sum = 0
+    for index in indexes:
+        sum += fixed_middle_page(rules, sequences[index])
+    return sum
 
 def fix_incorrect(rules: dict[list[int]], sequences: list[list[int]], indexes: list[int]) -> list[list[int]]:
     """Fixes all sequences at the indexes specified in sequences to be of the correct ordering.
@@ -96,34 +165,86 @@ def fix_incorrect(rules: dict[list[int]], sequences: list[list[int]], indexes: l
         sequences[index] = fix_incorrect_sequence(rules, sequence)
     return sequences
 
-if __name__ == "__main__":
+def parse_input(lines: Iterable[str]) -> tuple[dict[list[int]], list[list[int]]]:
+    """Parses the lines of the input into the rules and the sequences. The rules come first and are
+    separated from the sequences by an empty line.
+
+    Args:
+        lines (Iterable[str]): The lines of the input text.
+
+    Returns:
+        tuple[dict[list[int]], list[list[int]]]: The rules mapping each page to the pages that must come after it and the sequences.
+    """
     sequencesActive = False
     rules = {}
     sequences = []
+    for line in lines:
+        if (line.strip() == ""): # When get to empty line, switch to sequences
+            sequencesActive = True
+            continue
+        if not sequencesActive: # in rules section
+            [left, right] = line.split("|")
+            left = int(left)
+            right = int(right.strip())
+            if left in rules:
+                rules[left].append(right)
+            else:
+                rules[left] = [right]
+        else: # in sequences section
+            splittedList = line.strip().split(",")
+            for i in range(len(splittedList)):
+                splittedList[i] = int(splittedList[i])
+            sequences.append(splittedList)
+    return (rules, sequences)
+
+def read_input(path: str) -> tuple[dict[int, frozenset[int]], list[list[int]]]:
+    """Reads the input for the aoc runner.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        tuple[dict[int, frozenset[int]], list[list[int]]]: The rule index and the sequences.
+    """
+    with open(path, "r") as file:
+        (rules, sequences) = parse_input(file)
+    return (index_rules(rules), sequences)
+
+def part1(data: tuple[dict[int, frozenset[int]], list[list[int]]]) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        data (tuple[dict[int, frozenset[int]], list[list[int]]]): The rule index and sequences from read_input.
+
+    Returns:
+        int: The sum of the middle pages of the correct sequences.
+    """
+    (rules, sequences) = data
+    (correct, _) = get_correct_indexes(rules, sequences)
+    return sum_middle_index(sequences, correct)
+
+def part2(data: tuple[dict[int, frozenset[int]], list[list[int]]]) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        data (tuple[dict[int, frozenset[int]], list[list[int]]]): The rule index and sequences from read_input.
+
+    Returns:
+        int: The sum of the middle pages of the incorrect sequences once fixed.
+    """
+    (rules, sequences) = data
+    (_, incorrect) = get_correct_indexes(rules, sequences)
+    return sum_fixed_middle_pages(rules, sequences, incorrect)
+
+if __name__ == "__main__":
     # Opening the text file and formatting the data
     with open("./Data/day5.txt", "r") as file:
-        for line in file:
-            if (line == "\n"): # When get to empty line, switch to sequences
-                sequencesActive = True
-                continue
-            if not sequencesActive: # in rules section
-                [left, right] = line.split("|")
-                left = int(left)
-                right = int(right.strip())
-                if left in rules:
-                    rules[left].append(right)
-                else:
-                    rules[left] = [right]
-            else: # in sequences section
-                splittedList = line.strip().split(",")
-                for i in range(len(splittedList)):
-                    splittedList[i] = int(splittedList[i])
-                sequences.append(splittedList)
+        (rules, sequences) = parse_input(file)
 
+    rules = index_rules(rules)
     (correct, incorrect) = get_correct_indexes(rules, sequences)
     sumCorrectMiddleIndex = sum_middle_index(sequences, correct)
-    fixedSequences = fix_incorrect(rules, sequences, incorrect)
-    sumFixedIncorrectMiddleIndex = sum_middle_index(sequences, incorrect)
+    sumFixedIncorrectMiddleIndex = sum_fixed_middle_pages(rules, sequences, incorrect)
     print(f"(Part 1) The sum of the correct middle indexes: {sumCorrectMiddleIndex}")
     print(f"(Part 2) The sum of the newly corrected middle indexes: {sumFixedIncorrectMiddleIndex}")
             
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from day5 import determine_correct, fix_incorrect_sequence, index_rules, parse_input
+
+# CONSTANTS
+REQUEST_LINE_LIMIT = 64 * 1024 * 1024 # Largest request line in bytes a socket client can send
+
+def find_batch_error(sequences) -> str | None:
+    """Checks that a batch decoded from JSON is a list of non-empty lists of page numbers before any of it
+    is processed.
+
+    Args:
+        sequences: The sequences from the request.
+
+    Returns:
+        str | None: What is wrong with the batch, or None if it is well formed.
+    """
+    if not isinstance(sequences, list):
+        return "sequences must be a list"
+    for i, sequence in enumerate(sequences):
+        if not isinstance(sequence, list) or len(sequence) == 0:
+            return f"sequence {i} must be a non-empty list"
+        if not all(type(page) is int for page in sequence): # bool is an int subclass but not a page
+            return f"sequence {i} must only hold integer pages"
+    return None
+
+class SequenceValidationService():
+    """Holds the indexed page ordering rules and the running totals for a long-running validation
+    session so the rules only need to be parsed once no matter how many sequences come in.
+    """
+    def __init__(self, rulesPath: str):
+        """The SequenceValidationService initializer which loads and indexes the rules.
+
+        Args:
+            rulesPath (str): The path to the file holding the rules. Anything after the rules section is ignored.
+        """
+        self.rulesPath = rulesPath
+        self.rules = {}
+        self.rulesModified = None
+        self.correctMiddleSum = 0
+        self.fixedMiddleSum = 0
+        self.numSequences = 0
+        self.numBatches = 0
+        self.totalSeconds = 0.0
+        self.reload_rules()
+
+    def reload_rules(self) -> int:
+        """Reads the rules file again and replaces the rule index with the new rules. If the file can't
+        be read or is malformed an OSError or ValueError is raised and the old rules are kept.
+
+        Returns:
+            int: The number of pages that have rules.
+        """
+        with open(self.rulesPath, "r") as file:
+            lines = []
+            for line in file:
+                if line.strip() == "": # Only the rules section is needed
+                    break
+                lines.append(line)
+        modified = os.path.getmtime(self.rulesPath)
+        (rules, _) = parse_input(lines)
+        self.rules = index_rules(rules)
+        self.rulesModified = modified
+        return len(self.rules)
+
+    def reload_if_changed(self) -> bool:
+        """Hot-reloads the rules if the rules file has been modified since it was last loaded. Raises the
+        same errors as reload_rules.
+
+        Returns:
+            bool: Whether or not the rules were reloaded.
+        """
+        if os.path.getmtime(self.rulesPath) != self.rulesModified:
+            self.reload_rules()
+            return True
+        return False
+
+    def process_batch(self, sequences: list[list[int]]) -> dict:
+        """Validates a batch of sequences, fixing the incorrect ones and adding to the running middle
+        page sums. The running state is left untouched if any sequence in the batch is malformed.
+
+        Args:
+            sequences (list[list[int]]): The sequences to validate.
+
+        Returns:
+            dict: The per-sequence results along with the running sums and the timing of the batch.
+        """
+        start = time.perf_counter()
+        results = []
+        correctMiddleSum = 0
+        fixedMiddleSum = 0
+        for sequence in sequences:
+            if determine_correct(self.rules, sequence):
+                middle = sequence[len(sequence) // 2]
+                correctMiddleSum += middle
+                results.append({"correct": True, "fixed": sequence, "middle": middle})
+            else:
+                fixed = fix_incorrect_sequence(self.rules, list(sequence))
+                middle = fixed[len(fixed) // 2]
+                fixedMiddleSum += middle
+                results.append({"correct": False, "fixed": fixed, "middle": middle})
+        elapsed = time.perf_counter() - start
+        # Only add to the running state once the whole batch has gone through
+        self.correctMiddleSum += correctMiddleSum
+        self.fixedMiddleSum += fixedMiddleSum
+        self.numSequences += len(sequences)
+        self.numBatches += 1
+        self.totalSeconds += elapsed
+        return {
+            "results": results,
+            "correctMiddleSum": self.correctMiddleSum,
+            "fixedMiddleSum": self.fixedMiddleSum,
+            "latencyMs": elapsed * 1000,
+            "sequencesPerSecond": len(sequences) / elapsed if elapsed > 0 else None,
+        }
+
+    def stats(self) -> dict:
+        """Gets the totals for the session so far.
+
+        Returns:
+            dict: The running sums along with the overall batch and throughput numbers.
+        """
+        return {
+            "correctMiddleSum": self.correctMiddleSum,
+            "fixedMiddleSum": self.fixedMiddleSum,
+            "numSequences": self.numSequences,
+            "numBatches": self.numBatches,
+            "sequencesPerSecond": self.numSequences / self.totalSeconds if self.totalSeconds > 0 else None,
+        }
+
+    def handle_request(self, line: str) -> dict:
+        """Handles one JSON line request. A request is either a batch of sequences such as
+        {"sequences": [[75, 47, 61]]} or a command such as {"command": "reload"} or {"command": "stats"}.
+
+        Args:
+            line (str): The JSON encoded request.
+
+        Returns:
+            dict: The response to send back.
+        """
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            return {"error": f"Invalid JSON: {error}"}
+        if not isinstance(request, dict):
+            return {"error": "Request must be a JSON object"}
+        match request.get("command", "batch"):
+            case "batch":
+                try:
+                    reloaded = self.reload_if_changed()
+                except (OSError, ValueError) as error: # The rules file may be mid-rewrite, so keep the old rules
+                    return {"error": f"Could not reload rules: {error}"}
+                sequences = request.get("sequences", [])
+                batchError = find_batch_error(sequences)
+                if batchError is not None: # Keep serving when a client sends a malformed batch
+                    return {"error": f"Invalid batch: {batchError}"}
+                response = self.process_batch(sequences)
+                response["rulesReloaded"] = reloaded
+                return response
+            case "reload":
+                try:
+                    return {"numPagesWithRules": self.reload_rules()}
+                except (OSError, ValueError) as error:
+                    return {"error": f"Could not reload rules: {error}"}
+            case "stats":
+                return self.stats()
+            case command:
+                return {"error": f"Unknown command: {command}"}
+
+async def serve_stdin(service: SequenceValidationService):
+    """Answers JSON line requests from stdin on stdout until stdin closes.
+
+    Args:
+        service (SequenceValidationService): The service handling the requests.
+    """
+    loop = asyncio.get_running_loop()
+    # Reading in a thread works whether stdin is a pipe, a terminal or a redirected file and has no line limit
+    while line := await loop.run_in_executor(None, sys.stdin.buffer.readline):
+        if line.strip():
+            print(json.dumps(service.handle_request(line.decode(errors="replace"))), flush=True)
+
+async def serve_socket(service: SequenceValidationService, host: str, port: int):
+    """Answers JSON line requests from any number of TCP clients, all sharing the same rules and totals.
+
+    Args:
+        service (SequenceValidationService): The service handling the requests.
+        host (str): The host to listen on.
+        port (int): The port to listen on.
+    """
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answers the requests from a single client until it disconnects.
+
+        Args:
+            reader (asyncio.StreamReader): The stream of requests from the client.
+            writer (asyncio.StreamWriter): The stream of responses to the client.
+        """
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as error: # The line was over the limit and has been discarded
+                response = {"error": f"Request too long: {error}"}
+            else:
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = service.handle_request(line.decode(errors="replace"))
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    server = await asyncio.start_server(handle_client, host, port, limit=REQUEST_LINE_LIMIT)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running day 5 sequence validation service.")
+    parser.add_argument("--rules", default="./Data/day5.txt", help="The file holding the page ordering rules.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host to listen on when using a socket.")
+    parser.add_argument("--port", type=int, help="Listen on this TCP port instead of reading stdin.")
+    args = parser.parse_args()
+
+    service = SequenceValidationService(args.rules)
+    if args.port is None:
+        asyncio.run(serve_stdin(service))
+    else:
+        asyncio.run(serve_socket(service, args.host, args.port))
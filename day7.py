@@ -1,6 +1,10 @@
 import operator
+import time
 from itertools import product
 
+# CONSTANTS
+EQUATION_CHUNK_SIZE = 1000 # Equations handed to a worker at once
+
 def evaluate_equation(numbers: list[int], operators: list) -> int:
     """Evaluates the equation given a list of numbers and a list of operators. It will apply
         the each operator[i] to each number[i] and number[i+1]. This evaluates left to right and
@@ -38,6 +42,57 @@ def possibly_valid(result: int, equation: list[int], operators: list = [operator
             return True
     return False
 
+def next_power_of_ten(number: int) -> int:
+    """Gets the smallest power of ten greater than the number, which is what the left side gets
+    multiplied by when the number is concatenated onto it.
+
+    Args:
+        number (int): The non-negative number to get the power of ten for.
+
+    Returns:
+        int: The smallest power of ten greater than the number.
+    """
+    power = 10
+    while power <= number:
+        power *= 10
+    return power
+
+def possibly_valid_backward(result: int, equation: list[int], concatenation: bool = False) -> bool:
+    """Determines if there is a set of operators that makes the equation give the result by working
+    backwards from the result. The last number is undone from the target one operator at a time: +
+    is undone by subtraction, * only when the target is divisible by the number and concatenation only
+    when the target ends in the digits of the number. Any branch that can not be undone is dropped and the
+    search stops on the first success. The numbers are expected to be non-negative.
+
+    Args:
+        result (int): The answer to check for.
+        equation (list[int]): The list of numbers to check for.
+        concatenation (bool, optional): Whether the concatenation operator is allowed. Defaults to False.
+
+    Returns:
+        bool: Whether or not the given equation will result in the result given the valid operators.
+    """
+    stack = [(result, len(equation) - 1)]
+    while stack:
+        (target, index) = stack.pop()
+        number = equation[index]
+        if index == 0:
+            if target == number:
+                return True
+            continue
+        if target >= number:
+            stack.append((target - number, index - 1))
+        if number == 0:
+            if target == 0: # Anything multiplied by zero reaches a zero target
+                return True
+        elif target % number == 0:
+            stack.append((target // number, index - 1))
+        if concatenation:
+            power = next_power_of_ten(number)
+            if target % power == number:
+                stack.append((target // power, index - 1))
+    return False
+
 def sum_of_possibly_valid(results: list[int], equations: list[list[int]], part1=True) -> int:
     """Returns the sum of all of the equations that have possibly valid solutions given their result.
 
@@ -50,23 +105,74 @@ def sum_of_possibly_valid(results: list[int], equations: list[list[int]], part1=
         int: Sum of all of the possibly valid equations.
     """
     sum = 0
-    if part1:
-        for i in range(len(equations)):
-            if possibly_valid(results[i], equations[i]):
-                sum += results[i]
-    else:
-        for i in range(len(equations)):
-            if possibly_valid(results[i], equations[i], [operator.add, operator.mul, lambda x,y: int(str(x) + str(y))]):
-                sum += results[i]
+    for i in range(len(equations)):
+        if possibly_valid_backward(results[i], equations[i], not part1):
+            sum += results[i]
     return sum
 
+def solve_equation_chunk(results: list[int], equations: list[list[int]]) -> list[tuple[bool, bool, float]]:
+    """Solves a chunk of equations for both parts. An equation that is valid with + and * is
+    automatically valid for part 2 so only the ones that fail part 1 are searched again with concatenation.
 
+    Args:
+        results (list[int]): The results to compare to the equations.
+        equations (list[list[int]]): The equations which match one-to-one with the results.
 
-if __name__ == "__main__":
+    Returns:
+        list[tuple[bool, bool, float]]: For each equation whether it is valid for part 1, whether it is valid for part 2 and the seconds it took to solve.
+    """
+    outcomes = []
+    for i in range(len(equations)):
+        start = time.perf_counter()
+        validPart1 = possibly_valid_backward(results[i], equations[i])
+        validPart2 = validPart1 or possibly_valid_backward(results[i], equations[i], True)
+        outcomes.append((validPart1, validPart2, time.perf_counter() - start))
+    return outcomes
+
+def solve_all_equations(results: list[int], equations: list[list[int]], numWorkers: int | None = None, chunkSize: int = EQUATION_CHUNK_SIZE) -> tuple[int, int, list[tuple[bool, bool, float]]]:
+    """Solves every equation for both parts at once, spreading chunks of equations across a process pool.
+    When everything fits in one chunk it is solved in this process since starting the pool would cost more.
+
+    Args:
+        results (list[int]): The results to compare to the equations.
+        equations (list[list[int]]): The equations which match one-to-one with the results.
+        numWorkers (int | None, optional): The number of worker processes. Defaults to None which uses the CPU count.
+        chunkSize (int, optional): The number of equations per worker task. Defaults to EQUATION_CHUNK_SIZE.
+
+    Returns:
+        tuple[int, int, list[tuple[bool, bool, float]]]: The part 1 sum, the part 2 sum and the outcome of each equation as given by solve_equation_chunk.
+    """
+    if len(equations) <= chunkSize or numWorkers == 1:
+        outcomes = solve_equation_chunk(results, equations)
+    else:
+        from concurrent.futures import ProcessPoolExecutor # Small batches are solved in this process without the pool
+        starts = range(0, len(equations), chunkSize)
+        outcomes = []
+        with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+            chunks = executor.map(solve_equation_chunk, [results[i:i+chunkSize] for i in starts], [equations[i:i+chunkSize] for i in starts])
+            for chunk in chunks:
+                outcomes.extend(chunk)
+    sumPart1 = 0
+    sumPart2 = 0
+    for i, (validPart1, validPart2, _) in enumerate(outcomes):
+        if validPart1:
+            sumPart1 += results[i]
+        if validPart2:
+            sumPart2 += results[i]
+    return (sumPart1, sumPart2, outcomes)
+
+def read_input(path: str) -> tuple[list[int], list[list[int]]]:
+    """Reads the input file into the results and the equations.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        tuple[list[int], list[list[int]]]: The results and the equations which match one-to-one.
+    """
     results = []
     equations = []
-    # Opening the text file and formatting the data
-    with open("./Data/day7.txt", "r") as file:
+    with open(path, "r") as file:
         for line in file:
             (result, equation) = line.rstrip("\n").split(": ")
             results.append(int(result))
@@ -74,8 +180,34 @@ if __name__ == "__main__":
             for i in range(len(equation)):
                 equation[i] = int(equation[i])
             equations.append(equation)
+    return (results, equations)
+
+def part1(data: tuple[list[int], list[list[int]]]) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        data (tuple[list[int], list[list[int]]]): The results and equations from read_input.
+
+    Returns:
+        int: The sum of the possibly valid results.
+    """
+    return sum_of_possibly_valid(*data)
+
+def part2(data: tuple[list[int], list[list[int]]]) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        data (tuple[list[int], list[list[int]]]): The results and equations from read_input.
+
+    Returns:
+        int: The sum of the possibly valid results with concatenation.
+    """
+    return sum_of_possibly_valid(*data, False)
+
+if __name__ == "__main__":
+    # Opening the text file and formatting the data
+    (results, equations) = read_input("./Data/day7.txt")
 
-    posValidSum = sum_of_possibly_valid(results, equations)
-    posThreeVarValidSum = sum_of_possibly_valid(results, equations, False)
+    (posValidSum, posThreeVarValidSum, outcomes) = solve_all_equations(results, equations)
     print(f"(Part 1) The sum of the possible valid results is: {posValidSum}")
     print(f"(Part 2) The sum of the possible valid results with concatenation is: {posThreeVarValidSum}")
\ No newline at end of file
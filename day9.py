@@ -1,3 +1,10 @@
+import heapq
+import mmap
+from array import array
+
+# CONSTANTS
+MAX_SPAN_LENGTH = 9 # Each length in the compacted string is a single digit
+
 def convert_to_raw(compacted: str) -> list:
     """Converts the compacted filesystem string to the format with id number and "." representing free space.
 
@@ -47,6 +54,157 @@ def backweight_free_space(raw: list) -> list[str]:
         raw[frontIndex-1] = temp
     return raw
 
+def convert_to_spans(compacted: str) -> tuple[array, array, array, array]:
+    """Converts the compacted filesystem string to runs of blocks without expanding it. The id of a file
+    is its index in the file arrays and the free space following file i is at index i in the free arrays.
+
+    Args:
+        compacted (str): The compacted string to convert.
+
+    Returns:
+        tuple[array, array, array, array]: The start and length of each file followed by the start and length of each free space.
+    """
+    fileStarts = array("q")
+    fileLengths = array("q")
+    freeStarts = array("q")
+    freeLengths = array("q")
+    position = 0
+    for i, char in enumerate(compacted):
+        length = int(char)
+        if i % 2 == 0:
+            fileStarts.append(position)
+            fileLengths.append(length)
+        else:
+            freeStarts.append(position)
+            freeLengths.append(length)
+        position += length
+    return (fileStarts, fileLengths, freeStarts, freeLengths)
+
+def merge_free_spans(freeStarts: array, freeLengths: array) -> tuple[array, array]:
+    """Joins free spaces that touch because the files between them are empty, since they are really one
+    run of free blocks that a bigger file can fit into.
+
+    Args:
+        freeStarts (array): The start of each free space.
+        freeLengths (array): The length of each free space.
+
+    Returns:
+        tuple[array, array]: The start and length of each free run, leaving out empty ones.
+    """
+    mergedStarts = array("q")
+    mergedLengths = array("q")
+    for i in range(len(freeStarts)):
+        if freeLengths[i] == 0:
+            continue
+        if mergedStarts and mergedStarts[-1] + mergedLengths[-1] == freeStarts[i]:
+            mergedLengths[-1] += freeLengths[i]
+        else:
+            mergedStarts.append(freeStarts[i])
+            mergedLengths.append(freeLengths[i])
+    return (mergedStarts, mergedLengths)
+
+def backweight_free_space_spans(fileStarts: array, fileLengths: array, freeStarts: array, freeLengths: array) -> tuple[array, array, array]:
+    """Starting from the back moves each individual memory slot to the leftmost available free space, working
+    on whole runs of blocks at a time instead of single blocks.
+
+    Args:
+        fileStarts (array): The start of each file.
+        fileLengths (array): The length of each file.
+        freeStarts (array): The start of each free space.
+        freeLengths (array): The length of each free space.
+
+    Returns:
+        tuple[array, array, array]: The id, start and length of each run of blocks after the move.
+    """
+    ids = array("q")
+    starts = array("q")
+    lengths = array("q")
+    def add_span(idNum: int, start: int, length: int):
+        """Records a run of blocks belonging to a file.
+
+        Args:
+            idNum (int): The id of the file.
+            start (int): Where the run starts.
+            length (int): How many blocks are in the run.
+        """
+        if length > 0:
+            ids.append(idNum)
+            starts.append(start)
+            lengths.append(length)
+    backId = len(fileStarts) - 1
+    remaining = fileLengths[backId] if backId >= 0 else 0 # Blocks of the back file not moved yet
+    for idNum in range(len(fileStarts)):
+        if idNum > backId:
+            break
+        if idNum == backId:
+            add_span(idNum, fileStarts[idNum], remaining)
+            break
+        add_span(idNum, fileStarts[idNum], fileLengths[idNum])
+        if idNum >= len(freeStarts):
+            continue
+        freeStart = freeStarts[idNum]
+        freeLength = freeLengths[idNum]
+        while freeLength > 0 and backId > idNum:
+            moved = min(freeLength, remaining)
+            add_span(backId, freeStart, moved)
+            freeStart += moved
+            freeLength -= moved
+            remaining -= moved
+            if remaining == 0:
+                backId -= 1
+                remaining = fileLengths[backId]
+    return (ids, starts, lengths)
+
+def move_chunks_left_spans(fileStarts: array, fileLengths: array, freeStarts: array, freeLengths: array) -> tuple[array, array, array]:
+    """Moves whole files to the left to the leftmost free space that can accomodate them, working on the
+    runs of blocks instead of single blocks. The free spaces are indexed by a min-heap of start positions
+    for each length, so the leftmost fit is the smallest top across the heaps of lengths at least as big as
+    the file. Whatever is left of a free space after a move goes back into the heap for its new length.
+    Space freed by a move is never reused since only files further left are moved afterwards. Free spaces
+    separated only by empty files are merged first, and runs longer than any file share the heap for
+    MAX_SPAN_LENGTH with their real lengths kept on the side.
+
+    Args:
+        fileStarts (array): The start of each file.
+        fileLengths (array): The length of each file.
+        freeStarts (array): The start of each free space.
+        freeLengths (array): The length of each free space.
+
+    Returns:
+        tuple[array, array, array]: The id, start and length of each file after the move.
+    """
+    starts = array("q", fileStarts)
+    freeHeaps = [[] for _ in range(MAX_SPAN_LENGTH + 1)]
+    longLengths = {} # Start of each free run longer than MAX_SPAN_LENGTH to its length
+    for (freeStart, freeLength) in zip(*merge_free_spans(freeStarts, freeLengths)):
+        if freeLength > MAX_SPAN_LENGTH:
+            longLengths[freeStart] = freeLength
+        freeHeaps[min(freeLength, MAX_SPAN_LENGTH)].append(freeStart)
+    for heap in freeHeaps:
+        heapq.heapify(heap)
+    for idNum in range(len(fileStarts) - 1, -1, -1):
+        length = fileLengths[idNum]
+        if length == 0:
+            continue
+        bestLength = 0
+        bestStart = fileStarts[idNum] # Only free space left of the file counts
+        for freeLength in range(length, MAX_SPAN_LENGTH + 1):
+            heap = freeHeaps[freeLength]
+            if heap and heap[0] < bestStart:
+                bestLength = freeLength
+                bestStart = heap[0]
+        if bestLength:
+            heapq.heappop(freeHeaps[bestLength])
+            starts[idNum] = bestStart
+            if bestLength == MAX_SPAN_LENGTH:
+                bestLength = longLengths.pop(bestStart, MAX_SPAN_LENGTH)
+            if bestLength > length:
+                leftover = bestLength - length
+                if leftover > MAX_SPAN_LENGTH:
+                    longLengths[bestStart + length] = leftover
+                heapq.heappush(freeHeaps[min(leftover, MAX_SPAN_LENGTH)], bestStart + length)
+    return (array("q", range(len(fileStarts))), starts, array("q", fileLengths))
+
 def find_chunk(raw: list, char: int|str, size: int, maxMinIndex: int, from_left=True) -> int:
     """Finds the next available chunk from a particular direction which matches the given char and contains consecutive chars of
     length size.
@@ -131,17 +289,140 @@ def calculate_checksum(memoryChunks: list) -> int:
             checksum += (i * memoryChunks[i])
     return checksum
 
-if __name__ == "__main__":
+def run_checksum(idNum: int, start: int, length: int) -> int:
+    """Calculates what a run of blocks adds to the checksum, which is the id times the arithmetic series
+    of the positions it covers.
+
+    Args:
+        idNum (int): The id of the file the run belongs to.
+        start (int): Where the run starts.
+        length (int): How many blocks are in the run.
+
+    Returns:
+        int: The checksum of the run.
+    """
+    return idNum * (start * length + length * (length - 1) // 2)
+
+def calculate_checksum_compacted(compacted: bytes | str) -> int:
+    """Calculates the checksum after moving individual blocks to the leftmost free space straight from
+    the compacted string. A front pointer walks the digits in order while a back pointer hands out the
+    blocks of the last unmoved file, and each run is scored as it comes out so neither the expanded nor
+    the moved layout is ever built. Passing a memory-mapped file keeps the memory use constant.
+
+    Args:
+        compacted (bytes | str): The compacted string. A str is encoded to bytes first.
+
+    Returns:
+        int: The filesystem checksum after moving the blocks.
+    """
+    if isinstance(compacted, str):
+        compacted = compacted.encode()
+    end = len(compacted)
+    while end > 0 and not 48 <= compacted[end-1] <= 57: # Ignore a trailing newline
+        end -= 1
+    if end == 0:
+        return 0
+    checksum = 0
+    position = 0
+    front = 0
+    back = end - 1 if (end - 1) % 2 == 0 else end - 2 # Files are on the even indexes
+    backRemaining = compacted[back] - 48
+    while front <= back:
+        if front == back:
+            checksum += run_checksum(back // 2, position, backRemaining)
+            break
+        length = compacted[front] - 48
+        if front % 2 == 0:
+            checksum += run_checksum(front // 2, position, length)
+            position += length
+        else:
+            while length > 0 and back > front:
+                moved = min(length, backRemaining)
+                checksum += run_checksum(back // 2, position, moved)
+                position += moved
+                length -= moved
+                backRemaining -= moved
+                if backRemaining == 0:
+                    back -= 2
+                    backRemaining = compacted[back] - 48 if back >= 0 else 0
+        front += 1
+    return checksum
+
+def calculate_checksum_compacted_file(path: str) -> int:
+    """Calculates the checksum after moving individual blocks by memory mapping the file so even very
+    large inputs are scored in constant memory.
+
+    Args:
+        path (str): The path to the file holding the compacted string.
+
+    Returns:
+        int: The filesystem checksum after moving the blocks.
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0: # mmap can not map an empty file
+            return 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as compacted:
+            return calculate_checksum_compacted(compacted)
+
+def calculate_checksum_spans(ids: array, starts: array, lengths: array) -> int:
+    """Calculates the checksum for a memory arrangement given as runs of blocks. Each run adds its id
+    times the sum of the positions it covers, which is an arithmetic series.
+
+    Args:
+        ids (array): The id of the file each run belongs to.
+        starts (array): The start of each run.
+        lengths (array): The length of each run.
+
+    Returns:
+        int: The checksum for the given memory arrangement.
+    """
+    checksum = 0
+    for i in range(len(ids)):
+        checksum += run_checksum(ids[i], starts[i], lengths[i])
+    return checksum
+
+def read_input(path: str) -> str:
+    """Reads the compacted string from the input file.
+
+    Args:
+        path (str): The path to the input file.
+
+    Returns:
+        str: The compacted string.
+    """
     compacted = ""
-    # Opening the text file and formatting the data
-    with open("./Data/day9.txt", "r") as file:
+    with open(path, "r") as file:
         for line in file:
             compacted += line.strip()
-    raw = convert_to_raw(compacted)
-    otherRaw = convert_to_raw(compacted)
-    backweightFreeSpace = backweight_free_space(raw)
-    chunksFreeSpace = move_chunks_left(otherRaw)
-    checksum = calculate_checksum(backweightFreeSpace)
-    chunkChecksum = calculate_checksum(chunksFreeSpace)
+    return compacted
+
+def part1(compacted: str) -> int:
+    """Solves part 1 for the aoc runner.
+
+    Args:
+        compacted (str): The compacted string from read_input.
+
+    Returns:
+        int: The filesystem checksum after moving individual blocks.
+    """
+    return calculate_checksum_compacted(compacted)
+
+def part2(compacted: str) -> int:
+    """Solves part 2 for the aoc runner.
+
+    Args:
+        compacted (str): The compacted string from read_input.
+
+    Returns:
+        int: The filesystem checksum after moving whole files.
+    """
+    return calculate_checksum_spans(*move_chunks_left_spans(*convert_to_spans(compacted)))
+
+if __name__ == "__main__":
+    # Opening the text file and formatting the data
+    compacted = read_input("./Data/day9.txt")
+    spans = convert_to_spans(compacted)
+    checksum = calculate_checksum_compacted_file("./Data/day9.txt")
+    chunkChecksum = calculate_checksum_spans(*move_chunks_left_spans(*spans))
     print(f"(Part 1) The filesystem checksum is: {checksum}")
     print(f"(Part 2) The chunk filesystem checksum is: {chunkChecksum}")
\ No newline at end of file